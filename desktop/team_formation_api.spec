@@ -54,8 +54,6 @@ a = Analysis(
         "starlette.middleware",
         "starlette.middleware.cors",
         "starlette.routing",
-        "sse_starlette",
-        "sse_starlette.sse",
         # Data processing
         "pandas",
         "numpy",
@@ -2,6 +2,8 @@
 """Example script demonstrating the Team Formation API with SSE streaming."""
 
 import json
+from collections import defaultdict
+
 import requests
 
 
@@ -81,16 +83,12 @@ def main():
                         print("-" * 70)
 
                         # Group by team
-                        teams = {}
+                        teams = defaultdict(list)
                         for participant in data['participants']:
-                            team_num = participant['team_number']
-                            if team_num not in teams:
-                                teams[team_num] = []
-                            teams[team_num].append(participant)
+                            teams[participant['team_number']].append(participant)
 
                         # Display teams
-                        for team_num in sorted(teams.keys()):
-                            members = teams[team_num]
+                        for team_num, members in sorted(teams.items()):
                             print(f"\nTeam {team_num + 1} ({len(members)} members):")
                             for member in members:
                                 print(f"  • ID {member['id']:2d}: "
@@ -1,79 +1,245 @@
 """Solution callbacks for SSE progress streaming."""
 
 import asyncio
-import threading
-from typing import Optional
+import itertools
+import time
+from collections import deque
+
+import orjson
 
 from team_formation.team_assignment import SolutionCallback
-from team_formation.api.models import ProgressEvent
+
+
+class ProgressChannel:
+    """Hands progress events from the solver thread to the event loop.
+
+    There is a single producer (the solver callback) and a single consumer
+    (the SSE event generator), so a `deque`, whose ``append`` and
+    ``popleft`` are thread-safe, plus an `asyncio.Event` to wake the
+    consumer is all that is needed. This avoids the locking and futures of
+    `asyncio.Queue` on every solution.
+
+    The channel is bounded: when a slow client keeps the consumer from
+    draining it, the oldest events are dropped. Progress events are
+    snapshots, so only stale ones are lost, and the final events put after
+    the solver returns are always kept.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 32):
+        """Initialize the channel.
+
+        Args:
+            loop: Event loop that the consumer runs on
+            maxsize: Maximum number of pending events
+        """
+        self.loop = loop
+        self._events = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        # Whether a wakeup of the consumer is already scheduled
+        self._wakeup_pending = False
+        self.closed = False
+        """Set by `close` when the consumer has gone away"""
+        self.on_close = None
+        """Called by `close`, e.g. to stop the search producing the events"""
+
+    def put_threadsafe(self, event):
+        """Add an event from any thread.
+
+        Wakeups are coalesced: while one is pending, further events are
+        only appended and will be picked up by the same `get_batch`, so a
+        burst of solutions costs a single cross-thread wakeup.
+        """
+        self._events.append(event)
+        if not self._wakeup_pending:
+            self._wakeup_pending = True
+            self.loop.call_soon_threadsafe(self._ready.set)
+
+    def put_nowait(self, event):
+        """Add an event from the event loop thread."""
+        self._events.append(event)
+        self._ready.set()
+
+    def close(self):
+        """Mark that the consumer has gone away and call `on_close` if set."""
+        self.closed = True
+        if self.on_close is not None:
+            self.on_close()
+
+    async def get_batch(self) -> list:
+        """Wait until events are available and return all pending events."""
+        await self._ready.wait()
+        # Clear before draining so an event appended while draining
+        # schedules a new wakeup instead of being missed.
+        self._wakeup_pending = False
+        self._ready.clear()
+        batch = []
+        while self._events:
+            batch.append(self._events.popleft())
+        return batch
 
 
 class SSESolutionCallback(SolutionCallback):
-    """Solution callback that sends progress events via an async queue for SSE streaming.
+    """Solution callback that sends progress events via a channel for SSE streaming.
 
     This callback extends the base SolutionCallback and adds the ability to send
-    progress updates to an asyncio queue, which can then be consumed by a FastAPI
-    SSE endpoint.
+    progress updates to a `ProgressChannel`, which can then be consumed by a
+    FastAPI SSE endpoint. Progress is sent as
+    ``(solution_count, objective_value, wall_time, num_conflicts,
+    team_assignments)`` tuples that `progress_event` turns into event dicts.
     """
 
     def __init__(
         self,
-        event_queue: asyncio.Queue,
-        loop: asyncio.AbstractEventLoop,
-        stop_after_seconds: Optional[int] = None
+        channel: ProgressChannel,
+        min_interval: float = 0.1,
+        min_improvement: float = 0.01,
+        team_assignment=None,
     ):
         """Initialize the SSE solution callback.
 
+        The search time limit is not enforced here; it is passed to the
+        solver as ``max_time_in_seconds`` so CP-SAT stops on its own.
+
+        Progress events are rate limited: a solution is only sent if
+        ``min_interval`` seconds have passed since the last event or the
+        objective improved by at least ``min_improvement`` (relative).
+        The most recent solution is always kept so that it can be sent
+        with `flush` when the search ends.
+
         Args:
-            event_queue: Async queue to send progress events to
-            loop: Event loop for thread-safe queue operations
-            stop_after_seconds: Optional time limit for optimization
+            channel: Channel to send progress events to
+            min_interval: Minimum seconds between progress events
+            min_improvement: Relative objective improvement that bypasses
+                the rate limit
+            team_assignment: If given, the `TeamAssignment` being solved;
+                each sent event then includes the team number of every
+                participant in that solution
         """
-        super().__init__(stop_after_seconds=stop_after_seconds)
-        self.event_queue = event_queue
-        self.loop = loop
+        super().__init__(verbose=False)
+        self.channel = channel
+        self.team_assignment = team_assignment
         self.solution_count = 0
-        self._lock = threading.Lock()
+        # next() on itertools.count is atomic in CPython, so no lock is
+        # needed to number solutions from the solver thread.
+        self._counter = itertools.count(1)
+        self.min_interval = min_interval
+        self.min_improvement = min_improvement
+        self._last_emit_ts = float("-inf")
+        self._last_emit_objective = None
+        self._latest_progress = None
 
     def on_solution_callback(self):
         """Called by the CP-SAT solver when a new solution is found.
 
-        This method is called from the solver thread, so we need to be
-        thread-safe when interacting with the asyncio queue.
+        This method is called from the solver thread, so the event is
+        added with `ProgressChannel.put_threadsafe`.
         """
-        with self._lock:
-            self.solution_count += 1
-
-            # Create progress event
-            event = ProgressEvent(
-                event_type="progress",
-                solution_count=self.solution_count,
-                objective_value=float(self.objective_value),
-                wall_time=float(self.wall_time),
-                num_conflicts=int(self.num_conflicts),
-                message=f"Solution {self.solution_count}: objective={self.objective_value:.2f}, "
-                       f"time={self.wall_time:.2f}s, conflicts={self.num_conflicts}"
-            )
+        self.solution_count = next(self._counter)
 
-            # Send event to queue (thread-safe)
-            asyncio.run_coroutine_threadsafe(
-                self.event_queue.put(event),
-                self.loop
-            )
+        # Only collect the raw numbers here: the solver is blocked while
+        # this runs, so formatting is left to the event loop (see
+        # `progress_event`).
+        objective_value = float(self.objective_value)
+        now = time.monotonic()
+        emit = (now - self._last_emit_ts >= self.min_interval
+                or self._improved(objective_value))
 
-        # Check if we should stop based on time limit
-        if self.stop_after_seconds and (self.wall_time > self.stop_after_seconds):
-            asyncio.run_coroutine_threadsafe(
-                self.event_queue.put(
-                    ProgressEvent(
-                        event_type="progress",
-                        solution_count=self.solution_count,
-                        objective_value=float(self.objective_value),
-                        wall_time=float(self.wall_time),
-                        num_conflicts=int(self.num_conflicts),
-                        message=f"Time limit reached ({self.stop_after_seconds}s), stopping search..."
-                    )
-                ),
-                self.loop
+        # Team assignments are only read for solutions that are sent; the
+        # final assignment of a held back solution is in the complete event.
+        team_assignments = None
+        if emit and self.team_assignment is not None:
+            team_assignments = self.team_assignment.team_assignments_from_solution(
+                self.response_proto.solution
             )
-            self.stop_search()
+
+        progress = (
+            self.solution_count,
+            objective_value,
+            float(self.wall_time),
+            int(self.num_conflicts),
+            team_assignments,
+        )
+
+        if emit:
+            self._emit(progress, now)
+        else:
+            self._latest_progress = progress
+
+    def _improved(self, objective_value):
+        """Whether the objective improved enough to skip the rate limit."""
+        last = self._last_emit_objective
+        if last is None:
+            return True
+        return (last - objective_value) >= self.min_improvement * max(abs(last), 1.0)
+
+    def _emit(self, progress, now):
+        self._last_emit_ts = now
+        self._last_emit_objective = progress[1]
+        self._latest_progress = None
+        # Send progress to the channel (thread-safe)
+        self.channel.put_threadsafe(progress)
+
+    def flush(self):
+        """Send the latest solution if it was held back by the rate limit.
+
+        Must be called from the event loop thread after the solver returns.
+        """
+        if self._latest_progress is not None:
+            progress = self._latest_progress
+            self._latest_progress = None
+            self.channel.put_nowait(progress)
+
+
+def progress_event(progress, message=None) -> dict:
+    """Build a progress event dict from a callback progress tuple.
+
+    The dict has the fields of `team_formation.api.models.ProgressEvent`.
+    This is trusted outbound data, so no model is validated per event.
+
+    Args:
+        progress: ``(solution_count, objective_value, wall_time, num_conflicts,
+            team_assignments)``
+        message: Message to use instead of the default solution summary
+    """
+    solution_count, objective_value, wall_time, num_conflicts, team_assignments = progress
+    if message is None:
+        message = (
+            f"Solution {solution_count}: objective={objective_value:.2f}, "
+            f"time={wall_time:.2f}s, conflicts={num_conflicts}"
+        )
+    event = {
+        "event_type": "progress",
+        "solution_count": solution_count,
+        "objective_value": objective_value,
+        "wall_time": wall_time,
+        "num_conflicts": num_conflicts,
+        "message": message,
+    }
+    if team_assignments is not None:
+        # A numpy array of team numbers in participant order
+        event["team_assignments"] = team_assignments
+    return event
+
+
+# Progress event JSON for the common case of the default message and no
+# team assignments; matches ``orjson.dumps(progress_event(progress))``.
+_PROGRESS_TEMPLATE = (
+    b'{"event_type":"progress","solution_count":%d,"objective_value":%r,'
+    b'"wall_time":%r,"num_conflicts":%d,'
+    b'"message":"Solution %d: objective=%.2f, time=%.2fs, conflicts=%d"}'
+)
+
+
+def encode_progress(progress) -> bytes:
+    """Encode a callback progress tuple as progress event JSON bytes.
+
+    Events with team assignments are encoded with orjson; all others are
+    filled into a preformatted template without building a dict.
+    """
+    solution_count, objective_value, wall_time, num_conflicts, team_assignments = progress
+    if team_assignments is not None:
+        return orjson.dumps(progress_event(progress), option=orjson.OPT_SERIALIZE_NUMPY)
+    return _PROGRESS_TEMPLATE % (
+        solution_count, objective_value, wall_time, num_conflicts,
+        solution_count, objective_value, wall_time, num_conflicts,
+    )
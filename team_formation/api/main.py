@@ -1,23 +1,35 @@
 """FastAPI application for team formation with SSE progress streaming."""
 
 import asyncio
-import json
+import contextvars
+import gzip
+import hashlib
 import logging
+import mimetypes
+import multiprocessing
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, NamedTuple, Optional
 
 import numpy as np
+import orjson
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sse_starlette.sse import EventSourceResponse
-
-from team_formation.team_assignment import TeamAssignment
-from team_formation.api.callbacks import SSESolutionCallback
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
+
+from team_formation.api.callbacks import (
+    ProgressChannel,
+    SSESolutionCallback,
+    encode_progress,
+    progress_event,
+)
+from team_formation.api.model_cache import ModelCache
+from team_formation.api.worker import solve_team_assignment
 from team_formation.api.models import (
     TeamAssignmentRequest,
     TeamAssignmentResponse,
@@ -36,13 +48,36 @@ logger = logging.getLogger(__name__)
 # Check if running in production mode
 IS_PRODUCTION = os.getenv("PRODUCTION", "false").lower() == "true"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Shut down the solver process pool, if one was started."""
+    yield
+    executor = getattr(app.state, "executor", None)
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+        app.state.mp_manager.shutdown()
+        app.state.executor = None
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Team Formation API",
     description="API for constraint-based team formation with real-time progress updates",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Static file serving for Vue.js frontend (production/desktop mode)
+# Determine static files directory based on environment
+_static_dir_env = os.getenv("STATIC_DIR", "")
+if _static_dir_env:
+    # Explicit path from environment (set by Electron)
+    STATIC_DIR = Path(_static_dir_env)
+else:
+    STATIC_DIR = Path(__file__).parent.parent.parent / "ui" / "dist"
+
+SERVE_FRONTEND = (IS_PRODUCTION or getattr(sys, "frozen", False)) and STATIC_DIR.exists()
+
 # Configure CORS based on environment
 cors_origins_env = os.getenv("CORS_ORIGINS", "")
 
@@ -53,223 +88,498 @@ elif IS_PRODUCTION:
     # In production, use specific origins from environment variable
     allowed_origins = [origin.strip() for origin in cors_origins_env.split(",") if origin.strip()]
 
-    if not allowed_origins:
-        # If no CORS_ORIGINS set, allow same-origin only (container serving static files)
+    if not allowed_origins and not SERVE_FRONTEND:
         allowed_origins = ["*"]
         logger.warning("No CORS_ORIGINS set, allowing all origins. Set CORS_ORIGINS for production.")
 else:
     # Development: allow localhost
     allowed_origins = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Without allowed origins (a container serving the frontend itself, so
+# all requests are same-origin) the CORS middleware is left out entirely.
+if allowed_origins:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allowed_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+# Compress larger responses such as the OpenAPI schema. The event stream
+# and cached static files are left alone: they are excluded by content type
+# or already carry a Content-Encoding.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+# Queue sentinel marking the end of the progress event stream
+_DONE = object()
+
+# Number of assignments solved at the same time, see event_generator. Each
+# CP-SAT solve already uses several search workers, so this is kept low.
+MAX_CONCURRENT_SOLVES = int(os.getenv("MAX_CONCURRENT_SOLVES", "2"))
+_solve_slots = asyncio.Semaphore(MAX_CONCURRENT_SOLVES)
+# Threads that run in-process solves, one per solve slot
+_solver_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_SOLVES, thread_name_prefix="cpsat"
 )
+# Assignment requests being solved or waiting for a slot
+_inflight_solves = 0
 
+# Built models of recent requests, reused for identical requests
+model_cache = ModelCache(maxsize=int(os.getenv("MODEL_CACHE_SIZE", "32")))
 
-def convert_request_to_dataframes(
-    request: TeamAssignmentRequest,
-) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Convert API request to pandas DataFrames for TeamAssignment.
+
+def convert_constraints_to_dataframe(request: TeamAssignmentRequest) -> pd.DataFrame:
+    """Convert the request constraints to a DataFrame for TeamAssignment.
+
+    Participants are passed to TeamAssignment as the request's list of
+    dicts, which only turns the constrained attributes into columns.
 
     Args:
         request: The validated team assignment request
 
     Returns:
-        Tuple of (participants_df, constraints_df)
+        Constraints DataFrame with attribute, type and weight columns
     """
-    # Convert participants list to DataFrame
-    participants_df = pd.DataFrame(request.participants)
-
-    # Convert constraints list to DataFrame
-    constraints_data = [
-        {
-            "attribute": c.attribute,
-            "type": c.type,
-            "weight": c.weight,
-        }
-        for c in request.constraints
-    ]
-    constraints_df = pd.DataFrame(constraints_data) if constraints_data else pd.DataFrame(
-        columns=["attribute", "type", "weight"]
-    )
-
-    return participants_df, constraints_df
+    constraints = request.constraints
+    return pd.DataFrame({
+        "attribute": [c.attribute for c in constraints],
+        "type": [c.type for c in constraints],
+        "weight": [c.weight for c in constraints],
+    })
 
 
 def convert_result_to_response(
-    participants_df: pd.DataFrame,
+    participants: List[Dict[str, Any]],
+    team_assignments: np.ndarray,
+    num_teams: int,
     solution_count: int,
     wall_time: float,
 ) -> Dict[str, Any]:
     """Convert TeamAssignment result to API response format.
 
+    Each participant is returned as a new dict with its team number added,
+    without a round trip through a DataFrame; the request's dicts are left
+    unchanged. Every participant gets the keys of all participants, in
+    order of first appearance, with null for attributes it does not have.
+
     Args:
-        participants_df: DataFrame with team assignments in team_num column
+        participants: The request's participant dicts
+        team_assignments: Team number of each participant, in order
+        num_teams: Number of teams created by the solver
         solution_count: Number of solutions found during optimization
         wall_time: Total wall clock time in seconds
 
     Returns:
         Dictionary with participants and stats
     """
-    # Replace NaN values with None (which becomes null in JSON)
-    participants_df = participants_df.replace({pd.NA: None, pd.NaT: None, np.nan: None})
-
-    # Convert DataFrame to list of dicts
-    result_data = participants_df.to_dict(orient="records")
-
-    # Rename team_num to team_number for API consistency
-    for participant in result_data:
-        if "team_num" in participant:
-            participant["team_number"] = int(participant.pop("team_num"))
+    columns = {}
+    for participant in participants:
+        columns.update(dict.fromkeys(participant))
+    participants = [
+        {**columns, **participant, "team_number": team_num}
+        for participant, team_num in zip(participants, team_assignments.tolist())
+    ]
 
     # Build stats
     stats = {
         "solution_count": solution_count,
         "wall_time": wall_time,
-        "num_teams": int(participants_df["team_num"].nunique()) if "team_num" in participants_df else 0,
-        "num_participants": len(participants_df),
+        "num_teams": num_teams,
+        "num_participants": len(participants),
     }
 
     return {
-        "participants": result_data,
+        "participants": participants,
         "stats": stats,
     }
 
 
-async def run_team_assignment_async(
-    request: TeamAssignmentRequest,
-    event_queue: asyncio.Queue,
-    loop: asyncio.AbstractEventLoop,
-) -> Dict[str, Any]:
-    """Run team assignment in a background thread with progress updates.
+def validate_request(request: TeamAssignmentRequest) -> None:
+    """Reject requests that cannot produce a team assignment.
 
-    Args:
-        request: The validated team assignment request
-        event_queue: Queue to send progress events to
-        loop: Event loop for async operations
+    These checks are cheap and run before the SSE stream is opened, so an
+    obviously infeasible request gets a plain error response instead of
+    paying for model construction and solver startup.
 
-    Returns:
-        Dictionary with team assignment results
+    Args:
+        request: The team assignment request
 
     Raises:
-        Exception: If team assignment fails
+        HTTPException: With status 400 if the request is infeasible
     """
-    logger.info(
-        f"Starting team assignment: {len(request.participants)} participants, "
-        f"{len(request.constraints)} constraints, max_time={request.max_time}s"
-    )
+    num_participants = len(request.participants)
+    # With less_than_target a short roster still forms one smaller team;
+    # otherwise calc_team_sizes would have no team to put anyone in.
+    if not request.less_than_target and num_participants < request.target_team_size:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Not enough participants ({num_participants}) to form a team "
+                f"of target size {request.target_team_size}"
+            ),
+        )
 
-    # Convert request to DataFrames
-    participants_df, constraints_df = convert_request_to_dataframes(request)
-    logger.debug(f"Converted to DataFrames: participants shape={participants_df.shape}, "
-                 f"constraints shape={constraints_df.shape}")
-
-    # Create TeamAssignment instance
-    ta = TeamAssignment(
-        participants=participants_df,
-        constraints=constraints_df,
-        target_team_size=request.target_team_size,
-        less_than_target=request.less_than_target,
-    )
-    logger.info(f"Created TeamAssignment instance, target_team_size={request.target_team_size}")
+    ids = [p["id"] for p in request.participants if "id" in p]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Participant ids must be unique")
 
-    # Create SSE callback
-    callback = SSESolutionCallback(
-        event_queue=event_queue,
-        loop=loop,
-        stop_after_seconds=request.max_time,
-    )
-    logger.info(f"Created SSE callback with {request.max_time}s timeout")
 
-    # Run solver in thread pool to avoid blocking
+async def run_solver_in_thread(
+    request: TeamAssignmentRequest,
+    constraints_df: pd.DataFrame,
+    channel: ProgressChannel,
+) -> Dict[str, Any]:
+    """Build and solve the team assignment in a thread of this process.
+
+    Returns:
+        Dictionary with solution_found, team_assignments, solution_count and wall_time
+    """
+    # Run the model build and the solver in the thread pool, so that
+    # building the cache key and, on a miss, the model for a large roster
+    # does not block the event loop
     def run_solver():
-        """Run the solver synchronously."""
+        """Build and run the solver synchronously."""
+        # Create TeamAssignment instance, reusing the model of an identical
+        # earlier request if there is one
+        ta = model_cache.team_assignment(
+            request.participants,
+            constraints_df,
+            request.target_team_size,
+            request.less_than_target,
+        )
+        logger.info(f"Created TeamAssignment instance, target_team_size={request.target_team_size}")
+
+        # Create SSE callback. The time limit is enforced by the solver itself
+        # through max_time_in_seconds rather than by polling in the callback.
+        callback = SSESolutionCallback(
+            channel=channel,
+            team_assignment=ta if request.stream_assignments else None,
+        )
+        # Stop the search if the client disconnects; skip it entirely if
+        # the client left while the model was being built
+        channel.on_close = callback.StopSearch
+        if channel.closed:
+            logger.info("Client disconnected before solving, skipping solver")
+            return ta, callback
         logger.info("Starting CP-SAT solver...")
         ta.solve(
             solution_callback=callback,
             max_time_in_seconds=request.max_time,
+            num_search_workers=request.num_search_workers,
             log_progress=log_level == "DEBUG"
         )
         logger.info("Solver completed")
-        return ta
+        return ta, callback
 
-    # Execute solver in thread pool
+    # Execute solver in the solver thread pool. Unlike asyncio.to_thread,
+    # run_in_executor does not copy the context, so do that explicitly.
     logger.info("Launching solver in thread pool...")
-    ta_result = await asyncio.to_thread(run_solver)
-    logger.info(f"Solver thread completed, solution_found={ta_result.solution_found}")
-
-    # Check if solution was found
-    if not ta_result.solution_found:
-        raise Exception(
-            f"No solution found within {request.max_time} seconds. "
-            "Try increasing max_time or relaxing constraints."
+    context = contextvars.copy_context()
+    ta_result, callback = await asyncio.get_running_loop().run_in_executor(
+        _solver_executor, context.run, run_solver
+    )
+
+    # Make sure the final solution's progress event is not lost to the
+    # rate limiting in the callback.
+    callback.flush()
+
+    return {
+        "solution_found": ta_result.solution_found,
+        "team_assignments": ta_result.team_assignments,
+        "num_teams": ta_result.num_teams,
+        "solution_count": callback.solution_count,
+        "wall_time": callback.wall_time,
+    }
+
+
+def get_process_executor() -> ProcessPoolExecutor:
+    """Return the solver process pool, creating it on first use."""
+    if getattr(app.state, "executor", None) is None:
+        # "spawn" avoids forking a process that is already running threads
+        mp_context = multiprocessing.get_context("spawn")
+        app.state.mp_manager = mp_context.Manager()
+        # At most MAX_CONCURRENT_SOLVES solves run at once, so more
+        # worker processes would never be used
+        app.state.executor = ProcessPoolExecutor(
+            max_workers=MAX_CONCURRENT_SOLVES,
+            mp_context=mp_context,
         )
+    return app.state.executor
+
 
-    # Convert result to response format
-    result = convert_result_to_response(
-        participants_df=ta_result.participants,
-        solution_count=callback.solution_count,
-        wall_time=callback.wall_time,
+def forward_progress(progress_queue, channel: ProgressChannel):
+    """Copy events from a worker's progress queue to the progress channel.
+
+    Runs in a thread until the worker puts ``None`` on the progress queue.
+    """
+    while True:
+        event = progress_queue.get()
+        if event is None:
+            break
+        channel.put_threadsafe(event)
+
+
+async def run_solver_in_process(
+    request: TeamAssignmentRequest,
+    constraints_df: pd.DataFrame,
+    channel: ProgressChannel,
+) -> Dict[str, Any]:
+    """Build and solve the team assignment in a worker process.
+
+    Progress events cross the process boundary through a manager queue that
+    is drained by a forwarding thread.
+
+    Returns:
+        Dictionary with solution_found, team_assignments, solution_count and wall_time
+    """
+    executor = get_process_executor()
+    progress_queue = app.state.mp_manager.Queue()
+    # Lets a client disconnect stop the search in the worker
+    stop_event = app.state.mp_manager.Event()
+    channel.on_close = stop_event.set
+    if channel.closed:
+        stop_event.set()
+    forwarder = asyncio.create_task(
+        asyncio.to_thread(forward_progress, progress_queue, channel)
     )
+    try:
+        solved = await channel.loop.run_in_executor(
+            executor,
+            solve_team_assignment,
+            request.participants,
+            constraints_df,
+            request.target_team_size,
+            request.less_than_target,
+            request.max_time,
+            request.num_search_workers,
+            progress_queue,
+            request.stream_assignments,
+            stop_event,
+        )
+    except BaseException:
+        # The worker may have died before signalling the end of progress
+        progress_queue.put(None)
+        raise
+    finally:
+        await forwarder
+    return solved
 
-    return result
+
+async def run_team_assignment_async(
+    request: TeamAssignmentRequest,
+    channel: ProgressChannel,
+) -> Dict[str, Any]:
+    """Run team assignment in a background thread or process with progress updates.
+
+    The `_DONE` sentinel is put on the queue when this finishes, successfully
+    or not, to tell `event_generator` that no more progress events follow.
+
+    Args:
+        request: The validated team assignment request
+        channel: Channel to send progress events to
+
+    Returns:
+        Dictionary with team assignment results
+
+    Raises:
+        Exception: If team assignment fails
+    """
+    try:
+        logger.info(
+            f"Starting team assignment: {len(request.participants)} participants, "
+            f"{len(request.constraints)} constraints, max_time={request.max_time}s, "
+            f"num_search_workers={request.num_search_workers}"
+        )
+
+        # Convert constraints to a DataFrame
+        constraints_df = convert_constraints_to_dataframe(request)
+        logger.debug(f"Converted constraints to DataFrame: shape={constraints_df.shape}")
+
+        if request.use_process_pool:
+            logger.info("Launching solver in process pool...")
+            solved = await run_solver_in_process(
+                request, constraints_df, channel
+            )
+        else:
+            solved = await run_solver_in_thread(
+                request, constraints_df, channel
+            )
+        logger.info(f"Solver completed, solution_found={solved['solution_found']}")
+
+        # Check if solution was found
+        if not solved["solution_found"]:
+            raise Exception(
+                f"No solution found within {request.max_time} seconds. "
+                "Try increasing max_time or relaxing constraints."
+            )
+
+        # Convert result to response format
+        result = convert_result_to_response(
+            participants=request.participants,
+            team_assignments=solved["team_assignments"],
+            num_teams=solved["num_teams"],
+            solution_count=solved["solution_count"],
+            wall_time=solved["wall_time"],
+        )
+
+        return result
+    finally:
+        # Always wake the event generator, whether we succeeded or failed.
+        channel.put_nowait(_DONE)
+
+
+def sse_message(event: str, data: bytes) -> bytes:
+    """Encode one server-sent event.
+
+    ``data`` must be a single line, which holds for compact JSON.
+    """
+    return b"event: %s\r\ndata: %s\r\n\r\n" % (event.encode(), data)
+
+
+# Comment line sent while the solver is quiet to keep proxies from closing
+# the connection
+_PING = b": ping\r\n\r\n"
+PING_INTERVAL = 15
+
+# Number of participant events written together with chunked_result
+RESULT_CHUNK_SIZE = 256
+
+# Headers for the event stream; X-Accel-Buffering disables nginx buffering
+SSE_HEADERS = {
+    "Cache-Control": "no-store",
+    # Compressing would buffer events; this also keeps proxies from gzipping
+    "Content-Encoding": "identity",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
 
 
 async def event_generator(request: TeamAssignmentRequest):
     """Generate SSE events for team assignment progress.
 
+    At most `MAX_CONCURRENT_SOLVES` assignments are solved at once; further
+    requests wait for a free slot, receiving keep-alive pings meanwhile,
+    instead of piling long running solves onto the worker threads.
+
     Args:
         request: The validated team assignment request
 
     Yields:
-        Server-sent events with progress updates and final result
+        Encoded server-sent events with progress updates and final result
     """
-    # Create queue for events
-    event_queue = asyncio.Queue()
-    loop = asyncio.get_event_loop()
-
-    # Start team assignment in background
-    assignment_task = asyncio.create_task(
-        run_team_assignment_async(request, event_queue, loop)
-    )
-
+    global _inflight_solves
+    _inflight_solves += 1
+    acquired = False
+    assignment_task = None
     try:
-        # Stream progress events
-        while not assignment_task.done():
+        while not acquired:
             try:
-                # Wait for event with shorter timeout for more responsive streaming
-                event = await asyncio.wait_for(event_queue.get(), timeout=0.1)
-
-                # Send progress event
-                yield {
-                    "event": event.event_type,
-                    "data": event.model_dump_json(),
-                }
+                async with asyncio.timeout(PING_INTERVAL):
+                    await _solve_slots.acquire()
+                acquired = True
+            except TimeoutError:
+                yield _PING
+
+        # Start team assignment in background. The task holds the solve
+        # slot until it finishes, which may be after the client has gone.
+        channel = ProgressChannel(asyncio.get_running_loop())
+        assignment_task = asyncio.create_task(
+            run_team_assignment_async(request, channel)
+        )
+        assignment_task.add_done_callback(_release_solve_slot)
+
+        async for message in solve_events(request, channel, assignment_task):
+            yield message
+    finally:
+        if assignment_task is None:
+            if acquired:
+                _solve_slots.release()
+            _inflight_solves -= 1
+        elif not assignment_task.done():
+            # The client disconnected: stop the search to free the slot
+            channel.close()
+
+
+def _release_solve_slot(assignment_task: asyncio.Task) -> None:
+    """Free the solve slot of a finished assignment task."""
+    global _inflight_solves
+    _solve_slots.release()
+    _inflight_solves -= 1
+    if not assignment_task.cancelled():
+        # Retrieve the error of a stream abandoned by its client, so
+        # asyncio does not log it as never retrieved
+        assignment_task.exception()
+
+
+async def solve_events(
+    request: TeamAssignmentRequest,
+    channel: ProgressChannel,
+    assignment_task: asyncio.Task,
+):
+    """Generate the SSE events of a running team assignment.
 
-            except asyncio.TimeoutError:
-                # No event received, continue waiting
-                continue
+    Args:
+        request: The validated team assignment request
+        channel: Channel the assignment task sends progress events to
+        assignment_task: Task running `run_team_assignment_async`
 
-        # Drain any remaining events in queue
-        while not event_queue.empty():
-            event = await event_queue.get()
-            yield {
-                "event": event.event_type,
-                "data": event.model_dump_json(),
-            }
+    Yields:
+        Encoded server-sent events with progress updates and final result
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
 
-        # Get the final result
-        result = await assignment_task
+    last_progress = None
+    done = False
+    try:
+        # Stream progress events until the assignment task signals completion
+        while not done:
+            # Each wakeup drains every pending event. asyncio.timeout wraps
+            # the wait in place, where wait_for would wrap it in a new task.
+            try:
+                async with asyncio.timeout(PING_INTERVAL):
+                    batch = await channel.get_batch()
+            except TimeoutError:
+                yield _PING
+                continue
+            for progress in batch:
+                if progress is _DONE:
+                    done = True
+                    break
+                last_progress = progress
 
-        # Send completion event with results
-        yield {
-            "event": "complete",
-            "data": json.dumps(result),
-        }
+                # Send progress event
+                yield sse_message("progress", encode_progress(progress))
+
+        # Get the final result. Shielded so that a disconnect while
+        # waiting leaves the task, and the solve slot it holds, running
+        # until the solver has actually stopped.
+        result = await asyncio.shield(assignment_task)
+
+        # CP-SAT enforces the time limit itself, so tell the client here
+        # rather than from the solution callback.
+        if last_progress is not None and loop.time() - started >= request.max_time:
+            yield sse_message("progress", orjson.dumps(progress_event(
+                last_progress[:4] + (None,),
+                message=f"Time limit reached ({request.max_time}s), stopping search...",
+            )))
+
+        if request.chunked_result:
+            # Stats first, then one event per participant, written in
+            # groups to limit the number of sends, then a closing event
+            yield sse_message("complete_header", orjson.dumps({"stats": result["stats"]}))
+            participants = result["participants"]
+            for start in range(0, len(participants), RESULT_CHUNK_SIZE):
+                yield b"".join(
+                    sse_message("participant", orjson.dumps(participant, option=orjson.OPT_SERIALIZE_NUMPY))
+                    for participant in participants[start:start + RESULT_CHUNK_SIZE]
+                )
+            yield sse_message("complete_footer", orjson.dumps({"num_participants": len(participants)}))
+        else:
+            # Send completion event with results
+            yield sse_message("complete", orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY))
 
     except Exception as e:
         logger.error(f"Error during team assignment: {str(e)}", exc_info=True)
@@ -280,15 +590,13 @@ async def event_generator(request: TeamAssignmentRequest):
             message=str(e),
         )
 
-        yield {
-            "event": "error",
-            "data": error_event.model_dump_json(),
-        }
+        # pydantic-core serializes the model straight to JSON bytes
+        yield sse_message("error", error_event.__pydantic_serializer__.to_json(error_event))
 
 
 @app.post(
     "/api/assign_teams",
-    response_class=EventSourceResponse,
+    response_class=StreamingResponse,
     responses={
         200: {
             "description": "Server-sent events stream with progress and results",
@@ -302,7 +610,7 @@ async def event_generator(request: TeamAssignmentRequest):
         500: {"model": ErrorResponse, "description": "Server error"},
     },
 )
-async def assign_teams(request: TeamAssignmentRequest) -> EventSourceResponse:
+async def assign_teams(request: TeamAssignmentRequest) -> StreamingResponse:
     """Assign participants to teams based on weighted constraints.
 
     This endpoint accepts a team formation configuration and returns a stream
@@ -316,6 +624,10 @@ async def assign_teams(request: TeamAssignmentRequest) -> EventSourceResponse:
     - **complete**: Final team assignments (sent once at the end)
       - Contains: participants with team_number field, stats
 
+    - **complete_header**, **participant**, **complete_footer**: Sent
+      instead of **complete** when `chunked_result` is set
+      - Contain: stats; one participant with team_number field; num_participants
+
     - **error**: Error occurred during optimization
       - Contains: error message
 
@@ -357,86 +669,169 @@ async def assign_teams(request: TeamAssignmentRequest) -> EventSourceResponse:
         f"{len(request.constraints)} constraints, target_team_size={request.target_team_size}"
     )
 
-    return EventSourceResponse(event_generator(request))
+    validate_request(request)
+
+    return StreamingResponse(
+        event_generator(request),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+# Bodies of the constant JSON endpoints, encoded once. A new Response is
+# still created per request because middleware may add headers to it.
+_ENDPOINTS = {
+    "assign_teams": "/api/assign_teams (POST)",
+    "health": "/health",
+    "docs": "/docs",
+}
+_API_INFO_BODY = orjson.dumps({
+    "name": "Team Formation API",
+    "version": "1.0.0",
+    "endpoints": _ENDPOINTS,
+})
+_HEALTH_BODY = orjson.dumps({"status": "healthy"})
+_BUSY_BODY = orjson.dumps({"status": "busy"})
+_ROOT_BODY = orjson.dumps({
+    "name": "Team Formation API",
+    "version": "1.0.0",
+    "mode": "development",
+    "message": "Frontend should be served separately in development mode (npm run dev)",
+    "endpoints": _ENDPOINTS,
+})
 
 
 @app.get("/api")
 async def api_info():
     """API information endpoint."""
-    return {
-        "name": "Team Formation API",
-        "version": "1.0.0",
-        "endpoints": {
-            "assign_teams": "/api/assign_teams (POST)",
-            "health": "/health",
-            "docs": "/docs",
-        },
-    }
+    return Response(_API_INFO_BODY, media_type="application/json")
 
 
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    return {"status": "healthy"}
+    return Response(_HEALTH_BODY, media_type="application/json")
 
 
-# Static file serving for Vue.js frontend (production/desktop mode)
-# Determine static files directory based on environment
-_static_dir_env = os.getenv("STATIC_DIR", "")
-if _static_dir_env:
-    # Explicit path from environment (set by Electron)
-    STATIC_DIR = Path(_static_dir_env)
-else:
-    STATIC_DIR = Path(__file__).parent.parent.parent / "ui" / "dist"
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: the server is up, however busy it is."""
+    return Response(_HEALTH_BODY, media_type="application/json")
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe: fails while every solve slot is taken."""
+    if _inflight_solves >= MAX_CONCURRENT_SOLVES:
+        return Response(_BUSY_BODY, status_code=503, media_type="application/json")
+    return Response(_HEALTH_BODY, media_type="application/json")
+
+
+class StaticFile(NamedTuple):
+    """A frontend file held in memory."""
+
+    body: bytes
+    gzip_body: Optional[bytes]
+    media_type: str
+    etag: str
+
+
+# Types worth compressing; images and fonts are already compressed
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+def load_static_files(directory: Path) -> Dict[str, StaticFile]:
+    """Read all files under ``directory`` into memory.
+
+    The frontend build is small and does not change while the server runs,
+    so each file is read, hashed for its ETag and, where it helps, gzipped
+    once at startup instead of on every request.
+
+    Returns:
+        Mapping from path relative to ``directory`` (with ``/`` separators)
+        to the file
+    """
+    files = {}
+    for path in directory.rglob("*"):
+        if not path.is_file():
+            continue
+        body = path.read_bytes()
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        gzip_body = None
+        if media_type.startswith(_COMPRESSIBLE_TYPES) and len(body) > 1024:
+            compressed = gzip.compress(body, mtime=0)
+            if len(compressed) < len(body):
+                gzip_body = compressed
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        files[path.relative_to(directory).as_posix()] = StaticFile(
+            body, gzip_body, media_type, etag
+        )
+    return files
+
+
+def static_file_response(static_file: StaticFile, request: Request, cache_control: str) -> Response:
+    """Respond with a cached static file, honouring ETags and gzip."""
+    headers = {"ETag": static_file.etag, "Cache-Control": cache_control}
+    if static_file.gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if request.headers.get("if-none-match") == static_file.etag:
+        return Response(status_code=304, headers=headers)
+    body = static_file.body
+    if static_file.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        body = static_file.gzip_body
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type=static_file.media_type, headers=headers)
+
+
+# Vite puts a content hash in the names of built assets, so they never
+# change; index.html must be revalidated to pick up a new build.
+_IMMUTABLE = "public, max-age=31536000, immutable"
+_REVALIDATE = "no-cache"
+
+# Paths handled by the API rather than the frontend
+_BACKEND_PREFIXES = ("api/", "docs", "health")
+
+_FRONTEND_NOT_FOUND = {"message": "Frontend not found. Build the UI first: cd ui && npm run build"}
 
-SERVE_FRONTEND = (IS_PRODUCTION or getattr(sys, "frozen", False)) and STATIC_DIR.exists()
 
 if SERVE_FRONTEND:
-    # Mount static assets (CSS, JS, images)
-    app.mount("/assets", StaticFiles(directory=STATIC_DIR / "assets"), name="assets")
+    STATIC_FILES = load_static_files(STATIC_DIR)
 
     @app.get("/")
-    async def serve_frontend():
+    async def serve_frontend(request: Request):
         """Serve the Vue.js frontend."""
-        index_file = STATIC_DIR / "index.html"
-        if index_file.exists():
-            return FileResponse(index_file)
-        return {"message": "Frontend not found. Build the UI first: cd ui && npm run build"}
+        index_file = STATIC_FILES.get("index.html")
+        if index_file is not None:
+            return static_file_response(index_file, request, _REVALIDATE)
+        return _FRONTEND_NOT_FOUND
 
-    # Catch-all route for Vue.js client-side routing
+    # Catch-all route for static assets and Vue.js client-side routing
     @app.get("/{full_path:path}")
-    async def serve_frontend_routes(full_path: str):
-        """Serve Vue.js routes (for client-side routing)."""
+    async def serve_frontend_routes(full_path: str, request: Request):
+        """Serve frontend files and Vue.js routes (for client-side routing)."""
         # Don't catch API routes
-        if full_path.startswith("api/") or full_path.startswith("docs") or full_path.startswith("health"):
+        if full_path.startswith(_BACKEND_PREFIXES):
             raise HTTPException(status_code=404, detail="Not found")
 
         # Try to serve the requested file
-        file_path = STATIC_DIR / full_path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
+        static_file = STATIC_FILES.get(full_path)
+        if static_file is not None:
+            cache_control = _IMMUTABLE if full_path.startswith("assets/") else _REVALIDATE
+            return static_file_response(static_file, request, cache_control)
+        if full_path.startswith("assets/"):
+            raise HTTPException(status_code=404, detail="Not found")
 
         # Otherwise serve index.html for client-side routing
-        index_file = STATIC_DIR / "index.html"
-        if index_file.exists():
-            return FileResponse(index_file)
+        index_file = STATIC_FILES.get("index.html")
+        if index_file is not None:
+            return static_file_response(index_file, request, _REVALIDATE)
 
-        return {"message": "Frontend not found. Build the UI first: cd ui && npm run build"}
+        return _FRONTEND_NOT_FOUND
 else:
     @app.get("/")
     async def root():
         """Root endpoint with API information (development mode)."""
-        return {
-            "name": "Team Formation API",
-            "version": "1.0.0",
-            "mode": "development",
-            "message": "Frontend should be served separately in development mode (npm run dev)",
-            "endpoints": {
-                "assign_teams": "/api/assign_teams (POST)",
-                "health": "/health",
-                "docs": "/docs",
-            },
-        }
+        return Response(_ROOT_BODY, media_type="application/json")
 
 
 def run():
@@ -456,14 +851,25 @@ def run():
             log_level="warning",
         )
     else:
+        # Outside development, require uvloop and httptools (installed by
+        # uvicorn[standard] on non-Windows platforms) rather than silently
+        # falling back to the slower pure Python implementations. Reloading
+        # is only for development since it runs a file watcher process.
+        dev = os.getenv("DEV") == "1"
+        fast = not dev and sys.platform != "win32"
         uvicorn.run(
             "team_formation.api.main:app",
             host="0.0.0.0",
             port=port,
-            reload=True,
+            loop="uvloop" if fast else "auto",
+            http="httptools" if fast else "auto",
+            reload=dev,
+            workers=None if dev else int(os.getenv("WORKERS", "1")),
             log_level="warning",
         )
 
 
 if __name__ == "__main__":
+    # Needed for the solver process pool in the PyInstaller bundle
+    multiprocessing.freeze_support()
     run()
@@ -0,0 +1,90 @@
+"""Cache of built CP-SAT models for repeated team assignment requests."""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+from team_formation.team_assignment import TeamAssignment
+
+
+def model_cache_key(ta: TeamAssignment) -> Hashable:
+    """Build a cache key for the model of a (not yet built) team assignment.
+
+    The model structure depends on the values of the constrained attributes
+    (the distinct categories, numeric ranges and diversity targets), so the
+    key contains those values and not only the shape of the problem.
+    Unconstrained participant attributes such as names do not affect the
+    model and are left out.
+    """
+    constraints = tuple(
+        (attr_name, c["type"], c["weight"])
+        for attr_name, c in ta.attr_constraints.items()
+    )
+    values = tuple(
+        tuple(tuple(v) if isinstance(v, list) else v for v in ta.participants[attr_name])
+        for attr_name in ta.attr_constraints
+    )
+    return (ta.num_participants, ta.target_team_size, ta.less_than_target, constraints, values)
+
+
+class ModelCache:
+    """Least recently used cache of built `TeamAssignment` models.
+
+    A cache hit skips model construction: the new `TeamAssignment` gets a
+    copy of the cached model with `TeamAssignment.use_model_from`.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of models to keep
+        """
+        self.maxsize = maxsize
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def team_assignment(
+        self,
+        participants,
+        constraints_df,
+        target_team_size: int,
+        less_than_target: bool,
+    ) -> TeamAssignment:
+        """Create a `TeamAssignment`, reusing a cached model when possible.
+
+        Args:
+            participants: Participants data frame or list of participant dicts
+            constraints_df: Constraints data frame
+            target_team_size: Target size for each team
+            less_than_target: Make non-target-size teams smaller rather than larger
+        """
+        ta = TeamAssignment(
+            participants=participants,
+            constraints=constraints_df,
+            target_team_size=target_team_size,
+            less_than_target=less_than_target,
+            build=False,
+        )
+        key = model_cache_key(ta)
+        with self._lock:
+            cached = self._models.get(key)
+            if cached is not None:
+                self._models.move_to_end(key)
+
+        if cached is not None:
+            ta.use_model_from(cached)
+            return ta
+
+        ta.build_model()
+        # Keep a private copy of the model so later changes to this
+        # request's model (e.g. solution hints) do not leak into the cache.
+        template = copy.copy(ta)
+        template.model = ta.model.clone()
+        with self._lock:
+            self._models[key] = template
+            self._models.move_to_end(key)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+        return ta
@@ -4,6 +4,10 @@ from typing import Any, Dict, List, Union
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 
+VALID_CONSTRAINT_TYPES = frozenset({"diversify", "cluster", "cluster_numeric", "different"})
+"""Constraint types accepted by the API"""
+
+
 class ConstraintInput(BaseModel):
     """A constraint for team formation."""
 
@@ -15,10 +19,10 @@ class ConstraintInput(BaseModel):
     @classmethod
     def validate_constraint_type(cls, v: str) -> str:
         """Validate that the constraint type is one of the supported types."""
-        valid_types = {"diversify", "cluster", "cluster_numeric", "different"}
-        if v not in valid_types:
+        if v not in VALID_CONSTRAINT_TYPES:
             raise ValueError(
-                f"Invalid constraint type '{v}'. Must be one of: {', '.join(sorted(valid_types))}"
+                f"Invalid constraint type '{v}'. "
+                f"Must be one of: {', '.join(sorted(VALID_CONSTRAINT_TYPES))}"
             )
         return v
 
@@ -64,6 +68,23 @@ class TeamAssignmentRequest(BaseModel):
         description="Maximum time in seconds for optimization",
         gt=0
     )
+    num_search_workers: int = Field(
+        default=8,
+        description="Number of parallel CP-SAT search workers",
+        gt=0
+    )
+    use_process_pool: bool = Field(
+        default=False,
+        description="Solve in a separate worker process instead of a thread"
+    )
+    stream_assignments: bool = Field(
+        default=False,
+        description="Include each participant's team number in progress events"
+    )
+    chunked_result: bool = Field(
+        default=False,
+        description="Send the result as one event per participant instead of a single complete event"
+    )
 
     @model_validator(mode="after")
     def validate_constraints_match_participants(self) -> "TeamAssignmentRequest":
@@ -71,18 +92,25 @@ class TeamAssignmentRequest(BaseModel):
         if not self.participants:
             return self
 
-        # Get all attribute names from all participants
-        all_attributes = set()
-        for participant in self.participants:
-            all_attributes.update(participant.keys())
-
-        # Check each constraint references an existing attribute
-        for constraint in self.constraints:
-            if constraint.attribute not in all_attributes:
-                raise ValueError(
-                    f"Constraint attribute '{constraint.attribute}' does not exist in any participant. "
-                    f"Available attributes: {', '.join(sorted(all_attributes))}"
-                )
+        # Check each constraint references an existing attribute. The
+        # participants nearly always share one schema, so check against the
+        # first participant and only scan the others for attributes it lacks.
+        first = self.participants[0]
+        missing = [c.attribute for c in self.constraints if c.attribute not in first]
+        if missing:
+            # Build the union of attribute names once and report every
+            # missing attribute together
+            all_attributes = set().union(*self.participants)
+            missing = [attribute for attribute in missing if attribute not in all_attributes]
+        if missing:
+            names = ", ".join(f"'{attribute}'" for attribute in missing)
+            if len(missing) == 1:
+                problem = f"Constraint attribute {names} does not exist in any participant."
+            else:
+                problem = f"Constraint attributes {names} do not exist in any participant."
+            raise ValueError(
+                f"{problem} Available attributes: {', '.join(sorted(all_attributes))}"
+            )
 
         return self
 
@@ -120,7 +148,7 @@ class ProgressEvent(BaseModel):
 
     event_type: str = Field(..., description="Event type: progress, complete, or error")
     solution_count: int = Field(default=0, description="Number of solutions found")
-    objective_value: float = Field(default=0.0, description="Current best objective value")
+    objective_value: float = Field(default=0.0, description="Current best objective value; an upper bound on the weighted cost of the solution")
     wall_time: float = Field(default=0.0, description="Wall clock time in seconds")
     num_conflicts: int = Field(default=0, description="Number of conflicts in search")
     message: str = Field(default="", description="Human-readable progress message")
@@ -0,0 +1,123 @@
+"""Team assignment solving in a separate worker process.
+
+The functions in this module run inside a `ProcessPoolExecutor` worker so
+that model construction and the Python side of the CP-SAT solution
+callbacks do not compete for the GIL with the API event loop. The module
+is kept free of FastAPI imports so worker processes start quickly.
+"""
+
+import threading
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from team_formation.api.callbacks import SSESolutionCallback
+from team_formation.api.model_cache import ModelCache
+
+# Each worker process keeps its own cache of built models
+model_cache = ModelCache()
+
+
+class ProcessSolutionCallback(SSESolutionCallback):
+    """Solution callback that sends progress events to a multiprocessing queue.
+
+    The rate limiting of `SSESolutionCallback` is kept; only the transport
+    changes from a `ProgressChannel` to a (manager) queue shared with the API
+    process. The search is stopped at the next solution once ``stop_event``
+    (a manager event) is set, e.g. because the client disconnected.
+    """
+
+    def __init__(self, progress_queue, stop_event=None, **kwargs):
+        super().__init__(channel=progress_queue, **kwargs)
+        self.stop_event = stop_event
+
+    def on_solution_callback(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.StopSearch()
+            return
+        super().on_solution_callback()
+
+    def _emit(self, progress, now):
+        self._last_emit_ts = now
+        self._last_emit_objective = progress[1]
+        self._latest_progress = None
+        self.channel.put(progress)
+
+    def flush(self):
+        if self._latest_progress is not None:
+            progress = self._latest_progress
+            self._latest_progress = None
+            self.channel.put(progress)
+
+
+def stop_search_when_set(stop_event, callback, solved, poll_interval=0.5):
+    """Stop the callback's search once ``stop_event`` is set.
+
+    Runs in a thread of the worker until ``solved`` is set.
+    """
+    while not solved.is_set():
+        if stop_event.wait(poll_interval):
+            callback.StopSearch()
+            return
+
+
+def solve_team_assignment(
+    participants: List[Dict[str, Any]],
+    constraints_df: pd.DataFrame,
+    target_team_size: int,
+    less_than_target: bool,
+    max_time: int,
+    num_search_workers: int,
+    progress_queue,
+    stream_assignments: bool = False,
+    stop_event=None,
+) -> Dict[str, Any]:
+    """Build and solve a team assignment, reporting progress on a queue.
+
+    ``None`` is put on ``progress_queue`` when solving ends, successfully or
+    not, so the reader in the API process knows to stop. Setting
+    ``stop_event`` stops the search, or skips it if it is set before
+    solving starts.
+
+    Returns:
+        Dictionary with ``solution_found``, ``team_assignments`` (the team
+        number of each participant), ``num_teams``, ``solution_count`` and
+        ``wall_time``.
+    """
+    try:
+        ta = model_cache.team_assignment(
+            participants, constraints_df, target_team_size, less_than_target
+        )
+        callback = ProcessSolutionCallback(
+            progress_queue,
+            stop_event=stop_event,
+            team_assignment=ta if stream_assignments else None,
+        )
+        if stop_event is None or not stop_event.is_set():
+            # The callback only sees the event when a solution is found, so
+            # also watch it while the search goes without new solutions
+            solved = threading.Event()
+            if stop_event is not None:
+                threading.Thread(
+                    target=stop_search_when_set,
+                    args=(stop_event, callback, solved),
+                    daemon=True,
+                ).start()
+            try:
+                ta.solve(
+                    solution_callback=callback,
+                    max_time_in_seconds=max_time,
+                    num_search_workers=num_search_workers,
+                )
+            finally:
+                solved.set()
+        callback.flush()
+        return {
+            "solution_found": ta.solution_found,
+            "team_assignments": ta.team_assignments,
+            "num_teams": ta.num_teams,
+            "solution_count": callback.solution_count,
+            "wall_time": callback.wall_time,
+        }
+    finally:
+        progress_queue.put(None)
@@ -74,12 +74,14 @@
 # dictionary with keys attribute names from the `participants` data frame as
 # keys, a type of `diversify` or `cluster`, and a numeric `weight`.
 
+import functools
 import logging
+import os
 import re
 import sys
+import numpy as np
 import pandas as pd
 from itertools import chain
-from collections import Counter, defaultdict
 
 from ortools.sat.python import cp_model
 
@@ -94,6 +96,17 @@ logger = logging.getLogger(__name__)
 class TeamAssignment:
     """Create team assignments based on participant attributes and constraints
 
+    `participants` is a data frame or a list of participant dicts. For a
+    list, `participants` on the instance is a data frame with just the
+    constrained attributes.
+
+    The variables created for each participant are left unnamed unless
+    `debug_names` is `True`, since formatting their names is a noticeable
+    part of building the model for large rosters.
+
+    `num_search_workers` is the default number of parallel CP-SAT workers
+    for `solve`; by default one per CPU core.
+
     Examples
     --------
     >>> from team_assignment import TeamAssignment
@@ -158,18 +171,44 @@ class TeamAssignment:
     """List of all constraints types."""
 
     def __init__(
-        self, participants, constraints, target_team_size, less_than_target=False
+        self, participants, constraints, target_team_size, less_than_target=False,
+        build=True, debug_names=False, num_search_workers=None, greedy_hint=True,
     ):
         
-        self.model = cp_model.CpModel()
+        self.model = None
         """The CP-SAT model for creating variables and constraints"""
 
         self.solution_found = False
         """The `solve` method will set this to `True` if a solution is found"""
+
+        self._team_var_indices = None
+
+        self.debug_names = debug_names
+        """Whether to name the per-participant CP-SAT variables"""
+
+        self.num_search_workers = num_search_workers or os.cpu_count() or 8
+        """Default number of parallel search workers for `solve`"""
+
+        self.greedy_hint = greedy_hint
+        """Whether to hint a greedy initial assignment to the solver"""
         
+        if not isinstance(participants, pd.DataFrame):
+            # A list of participant dicts: only the constrained attributes
+            # are needed to build the model, so only those become columns.
+            participants = pd.DataFrame(
+                {
+                    attr_name: [parti.get(attr_name) for parti in participants]
+                    for attr_name in constraints["attribute"]
+                },
+                index=pd.RangeIndex(len(participants)),
+            )
         self.participants = participants
         """Input variable: participants with attributes"""
 
+        self.team_assignments = None
+        """The `solve` method sets this to a numpy array with the team number
+        of each participant, in participant order"""
+
         self.num_participants = len(self.participants)
         """Number of participants"""
 
@@ -192,10 +231,10 @@ class TeamAssignment:
         for attr_name in self.attr_constraints:
             ct_type = self.attr_constraints[attr_name]["type"]
             if ct_type == self.CT_CLUSTER_NUMERIC:
-                logger.info(f"Creating {ct_type} numeric constraint on '{attr_name}'.")
+                logger.info("Creating %s numeric constraint on '%s'.", ct_type, attr_name)
                 self.numeric_attr_names.append(attr_name)
             elif ct_type in self.CONSTRAINT_TYPES:
-                logger.info(f"Creating {ct_type} category constraint on '{attr_name}'.")
+                logger.info("Creating %s category constraint on '%s'.", ct_type, attr_name)
                 self.attr_names.append(attr_name)
             else:
                 logger.error(
@@ -203,6 +242,12 @@ class TeamAssignment:
                 )
                 raise ValueError("Unknown constraint type", ct_type)
 
+        #: Values of the numeric attributes in participant order
+        self.numeric_values = {
+            attr_name: self.participants[attr_name].to_numpy()
+            for attr_name in self.numeric_attr_names
+        }
+
         #: Input variable: desired target team size
         self.target_team_size = target_team_size
 
@@ -215,7 +260,22 @@ class TeamAssignment:
         )
         #: Number of teams
         self.num_teams = len(self.team_sizes)
-        logger.info(f"Creating {self.num_teams} teams of size {self.team_sizes}")
+        logger.info("Creating %s teams of size %s", self.num_teams, self.team_sizes)
+
+        if build:
+            self.build_model()
+
+    # ## Building the Model
+    #
+    # The `build_model` method creates the CP-SAT variables, constraints,
+    # and objective from the inputs. It is called from the constructor
+    # unless `build=False` is passed, in which case the model can instead
+    # be copied from an identical, already built assignment with
+    # `use_model_from`.
+
+    def build_model(self):
+        """Create the CP-SAT model for the participants and constraints."""
+        self.model = cp_model.CpModel()
 
         # ### Attribute Value Boolean Variable Names
         #
@@ -228,51 +288,18 @@ class TeamAssignment:
 
         # ### Participant Variables
         #
-        # Next we create the `parti_vars` array with one entry for each
-        # participant. Each particpant's entry in the array contains a map from
-        # attribute name to the list of CP-SAT variables.
-        # 1. For each categorical attribute a set of boolean variables indicating
-        # whether the participant has that value of the attribute. A constraint
-        # of `bool_var == 1` for the presence of the value in the data and
-        # `bool_var == 0` for the other attribute values.
-        # 2. For each numeric variable there is an integer variable with
-        # the numeric value for that participant.
-        #
-        self.parti_vars = []
-        for id, parti in self.participants.iterrows():
-            attr_vars = defaultdict(list)
-            for attr_name in self.attr_vals:
-                bool_vars = []
-                parti_vals = parti[attr_name]
-                # If a participant can have multiple values of an attribute,
-                # they are represented as a list.
-                if isinstance(parti_vals, list):
-                    verb = "has"
-                else:
-                    verb = "is"
-                    parti_vals = [parti_vals]
-                attr_vals = [
-                    make_attr_value_name(attr_name, pv, verb) for pv in parti_vals
-                ]
-                for bool_var_cat in self.attr_vals[attr_name]:
-                    bool_var = self.model.new_bool_var(bool_var_cat)
-                    bool_vars.append(bool_var)
-                    if bool_var_cat in attr_vals:
-                        self.model.add(bool_var == 1)
-                    else:
-                        self.model.add(bool_var == 0)
-                attr_vars[attr_name] = bool_vars
-            # We don't need variables for the numeric values, we just
-            # use the literals. We can maybe modify the boolean case
-            # to use a similar approach.
-            # for attr_name in self.numeric_attr_names:
-            #     parti_var = self.model.NewIntVar(
-            #         self.participants[attr_name].min(),
-            #         self.participants[attr_name].max(),
-            #         f"{attr_name}_parti_val_{id}"
-            #     )
-            #     self.model.Add(parti_var == self.participants)
-            self.parti_vars.append(attr_vars)
+        # Next we create the `attr_matrix` map from attribute name to a
+        # boolean matrix with a row for each participant and a column for each
+        # value in `attr_vals`, `True` where the participant has that value.
+        # These are known constants, so they are kept in NumPy rather than as
+        # CP-SAT variables pinned to a value. Numeric attributes use the
+        # participant values directly.
+        self.attr_matrix = {
+            attr_name: attr_value_matrix(
+                attr_name, self.participants[attr_name], self.attr_vals[attr_name]
+            )
+            for attr_name in self.attr_vals
+        }
 
         # ### Team Assignment Constraints
         #
@@ -280,34 +307,84 @@ class TeamAssignment:
         # `team_sizes` variable that is indexed by team number and holds the
         # size of each team. We now create an array of `num_teams` boolean
         # variables for each participant indicating whether that participant is
-        # on the corresponding team. That array of team assignment variables is
-        # put in the `parti_vars` map of each participant with the key `"team"`.
+        # on the corresponding team. The team assignment variables are kept in
+        # the `team_vars` array with a row for each participant and a column
+        # for each team, so `team_vars[:, team_num]` are the variables of a team.
         #
-        # We also add a constraint that the sum of each participant's team
-        # boolean variables must be `1` (a participant can only be on one team)
+        # We also add an exactly-one constraint on each participant's team
+        # boolean variables (a participant can only be on one team)
         # and another constraint that the sum of each of the boolean variables for
         # each team must be equal to the team size to ensure the correct number
         # of participants in each team.
+        #
+        # The counts and costs are linear in the team booleans, so those stay
+        # the primary encoding. Each participant also gets a single integer
+        # variable in `team_num_vars` with domain `0..num_teams-1`, channeled
+        # to their booleans, so the solver can also reason about the team
+        # number directly and a solution's assignment is one value per
+        # participant.
 
         ## Create team variables
+        self.team_vars = np.empty((self.num_participants, self.num_teams), dtype=object)
         for id in range(self.num_participants):
             # Each participant has a boolean per team to indicate team membership
-            parti_team_vars = []
-            for team_num, team_size in enumerate(self.team_sizes):
-                team_var = self.model.NewBoolVar(f"parti_{id}_in_team_{team_num}")
-                parti_team_vars.append(team_var)
-            self.parti_vars[id]["team"] = parti_team_vars
+            for team_num in range(self.num_teams):
+                self.team_vars[id, team_num] = self.model.NewBoolVar(
+                    f"parti_{id}_in_team_{team_num}" if self.debug_names else ""
+                )
             # Add a constraint so a participant can only be in one team
-            self.model.Add(cp_model.LinearExpr.Sum(parti_team_vars) == 1)
+            self.model.add_exactly_one(self.team_vars[id].tolist())
+        self.team_num_vars = np.empty(self.num_participants, dtype=object)
+        team_nums = cp_model.Domain(0, self.num_teams - 1)
+        for id in range(self.num_participants):
+            team_num_var = self.model.new_int_var_from_domain(
+                team_nums, f"parti_{id}_team" if self.debug_names else ""
+            )
+            self.model.add(
+                team_num_var
+                == cp_model.LinearExpr.WeightedSum(
+                    self.team_vars[id].tolist(), range(self.num_teams)
+                )
+            )
+            self.team_num_vars[id] = team_num_var
 
         ## Enforce desired team size on each team
         for team_num, team_size in enumerate(self.team_sizes):
-            team_vars = [
-                self.parti_vars[id]["team"][team_num]
-                for id in range(self.num_participants)
-            ]
+            team_vars = self.team_vars[:, team_num].tolist()
             self.model.Add(cp_model.LinearExpr.Sum(team_vars) == team_size)
 
+        ## Break the symmetry between teams of the same size
+        #
+        # The costs of a team only depend on its size and its members, so
+        # renumbering teams of the same size gives an equivalent solution.
+        # Requiring the lowest participant id in each of those teams to
+        # increase with the team number keeps one of the equivalent solutions
+        # and spares the solver from searching the others.
+        first_members = []
+        for team_num in range(self.num_teams):
+            first_member = self.model.new_int_var(
+                0, self.num_participants - 1, f"team_{team_num}_first_member"
+            )
+            # A participant's id if they are on the team, otherwise a value
+            # larger than any id
+            self.model.add_min_equality(first_member, [
+                self.num_participants - (self.num_participants - id) * team_var
+                for id, team_var in enumerate(self.team_vars[:, team_num].tolist())
+            ])
+            first_members.append(first_member)
+        group_starts = [0]
+        for team_num in range(1, self.num_teams):
+            if self.team_sizes[team_num] == self.team_sizes[team_num - 1]:
+                self.model.add(first_members[team_num - 1] < first_members[team_num])
+            else:
+                group_starts.append(team_num)
+        # The first participant is the first member of their team, so that
+        # team comes first among the teams of its size. Stating this on the
+        # team number directly fixes it before any search.
+        self.model.add_linear_expression_in_domain(
+            self.team_num_vars[0], cp_model.Domain.from_values(group_starts)
+        )
+
         # ### Team Attribute Value Count Variables
         #
         # Both the diversity and clustering constraints used for team formation
@@ -389,15 +466,23 @@ class TeamAssignment:
         # Diversity constraints rely on a measurement of the distribution
         # of the attribute values across the entire population.
         self.population_dist = {}
+        # Value count targets by (attribute, team size), see
+        # `value_count_targets`
+        self._count_targets = {}
 
-        # The list of all cost variables
+        # The list of all cost variables and the weight of each one
         self.attr_costs = []
+        self.attr_cost_weights = []
+        # The cost variables of each team; the `create_*_costs` methods
+        # return a list of cost variables for each team
+        self.team_costs = [[] for _ in range(self.num_teams)]
 
         for attr_name in self.attr_constraints:
             constraint = self.attr_constraints[attr_name]
             if constraint["type"] == self.CT_DIVERSIFY:
                 pop_dist = self.population_distribution(attr_name)
-                logger.info(f"Population distribution for {attr_name}: {dict(pop_dist)}")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Population distribution for %s: %s", attr_name, dict(pop_dist))
                 self.population_dist[attr_name] = pop_dist
                 costs = self.create_diversity_costs(attr_name)
             if constraint["type"] == self.CT_CLUSTER:
@@ -406,16 +491,70 @@ class TeamAssignment:
                 costs = self.create_numeric_clustering_costs_range(attr_name)
             if constraint["type"] == self.CT_DIFFERENT:
                 costs = self.create_difference_costs(attr_name)
-            if constraint["weight"] != 1:
-                costs = [cost * constraint["weight"] for cost in costs]
-            self.attr_costs.extend(costs)
+            for team_num, team_costs in enumerate(costs):
+                self.team_costs[team_num].extend(team_costs)
+                self.attr_costs.extend(team_costs)
+                self.attr_cost_weights.extend([constraint["weight"]] * len(team_costs))
 
         ## Minimize the sum of the cost variables
         #
         # The last step before solving for team assignments is informing the model
-        # of the need to minimize the sum of the cost variables.
+        # of the need to minimize the weighted sum of the cost variables.
+        #
+        self.model.Minimize(
+            cp_model.LinearExpr.WeightedSum(self.attr_costs, self.attr_cost_weights)
+        )
+
+        ## Hint a greedy solution
         #
-        self.model.Minimize(cp_model.LinearExpr.Sum(self.attr_costs))
+        # A quick heuristic assignment gives the solver a complete solution
+        # to start improving on, instead of having to find a first one.
+        # Hints can also steer the search badly, so they can be turned off.
+        if self.greedy_hint:
+            self._add_assignment_hint(self._greedy_initial_assignment())
+
+    def hint_assignment(self, team_assignments):
+        """Hint a known team number for each participant to the solver.
+
+        This replaces the greedy hint, for example with the assignment from
+        a previous solve after the constraints were edited. Solve with
+        `repair_hint=True` so the solver repairs a hint that is no longer
+        feasible instead of dropping it.
+        """
+        team_assignments = np.asarray(team_assignments)
+        if len(team_assignments) != self.num_participants:
+            raise ValueError(
+                f"Expected {self.num_participants} team numbers, "
+                f"got {len(team_assignments)}"
+            )
+        self.model.clear_hints()
+        self._add_assignment_hint(team_assignments)
+
+    def _add_assignment_hint(self, team_assignments):
+        for id, team in enumerate(team_assignments.tolist()):
+            for team_num, team_var in enumerate(self.team_vars[id].tolist()):
+                self.model.add_hint(team_var, team_num == team)
+            self.model.add_hint(self.team_num_vars[id], team)
+
+    def use_model_from(self, other):
+        """Use a copy of the model built by another `TeamAssignment`.
+
+        `other` must have been created from the same participant attribute
+        values, constraints, and team sizes. Variables are referenced by
+        index, so the variables of `other` remain valid for the copy.
+        """
+        self.model = other.model.clone()
+        self.attr_vals = other.attr_vals
+        self.attr_matrix = other.attr_matrix
+        self.team_vars = other.team_vars
+        self.team_value_count = other.team_value_count
+        self.population_dist = other.population_dist
+        self._count_targets = other._count_targets
+        self.attr_costs = other.attr_costs
+        self.attr_cost_weights = other.attr_cost_weights
+        self.team_costs = other.team_costs
+        self.team_num_vars = other.team_num_vars
+        self._team_var_indices = other._team_var_indices
 
     def __repr__(self):
         repr = (
@@ -431,61 +570,126 @@ class TeamAssignment:
     # ### Team Attribute Value Count Variables
     #
     def create_attr_counts(self, attr_name):
-        """Create attribute value counts for each team."""
+        """Create attribute value counts for each team.
+
+        The participant attribute values are known, so the count of a value
+        in a team is the sum of the team variables of the participants with
+        that value; no product of team and attribute variables is needed.
+        """
         team_attr_counts = []
         attr_vals = self.attr_vals[attr_name]
+        # The ids of the participants with each attribute value
+        members = [
+            np.flatnonzero(has_val).tolist() for has_val in self.attr_matrix[attr_name].T
+        ]
         for team_num, team_size in enumerate(self.team_sizes):
             team_counts = []
             for attr_val_index, attr_val in enumerate(attr_vals):
-                parti_counts = []
                 team_attr_count = self.model.NewIntVar(
                     0, team_size, f"team_{team_num}_{attr_val}_count"
                 )
-                for id in range(self.num_participants):
-                    team_var = self.parti_vars[id]["team"][team_num]
-                    attr_var = self.parti_vars[id][attr_name][attr_val_index]
-                    parti_count = self.model.new_int_var(
-                        0,
-                        team_size,
-                        f"parti_{id}_team_{team_num}_{attr_val}_count"
-                    )
-                    # Use team_var*attr_var to calculate And(team_var, attr_var)
-                    self.model.add_multiplication_equality(
-                        parti_count, [team_var, attr_var]
-                    )
-                    logger.info(f"{parti_count} == {team_var}*{attr_var}")
-                    # This is an alternative that doesn't seem to perform as well
-                    # self.model.Add(parti_count == attr_var).OnlyEnforceIf(team_var)
-                    # self.model.Add(parti_count == 0).OnlyEnforceIf(team_var.Not())
-                    parti_counts.append(parti_count)
-                self.model.add(team_attr_count == cp_model.LinearExpr.Sum(parti_counts))
+                team_vars = self.team_vars[members[attr_val_index], team_num].tolist()
+                self.model.add(team_attr_count == cp_model.LinearExpr.Sum(team_vars))
                 team_counts.append(team_attr_count)
             team_attr_counts.append(team_counts)
         return team_attr_counts
 
+    # ### Greedy Initial Assignment
+    #
+    def _greedy_initial_assignment(self):
+        """Return a heuristic team number for each participant.
+
+        Participants are sorted by their clustered attribute values and
+        then by their other constrained attribute values. With clustering
+        constraints, teams are filled one after the other from the sorted
+        participants so similar participants end up together; otherwise the
+        participants are dealt out to the teams in turn so each value is
+        spread across the teams. The teams are numbered to satisfy the
+        symmetry breaking constraints.
+        """
+        cluster_keys = []
+        spread_keys = []
+        for attr_name, constraint in self.attr_constraints.items():
+            if constraint["type"] == self.CT_CLUSTER_NUMERIC:
+                key = self.participants[attr_name].to_numpy()
+            else:
+                key = self.attr_matrix[attr_name].argmax(axis=1)
+            if constraint["type"] in (self.CT_CLUSTER, self.CT_CLUSTER_NUMERIC):
+                cluster_keys.append(key)
+            else:
+                spread_keys.append(key)
+        # np.lexsort sorts by the last key first
+        keys = spread_keys[::-1] + cluster_keys[::-1]
+        if keys:
+            order = np.lexsort(keys)
+        else:
+            order = np.arange(self.num_participants)
+
+        team_sizes = np.array(self.team_sizes)
+        if cluster_keys:
+            slots = np.repeat(np.arange(self.num_teams), team_sizes)
+        else:
+            # Round r gives a member to each team with more than r members
+            slots = np.concatenate([
+                np.flatnonzero(team_sizes > r) for r in range(team_sizes.max())
+            ])
+        team_of_participant = np.empty(self.num_participants, dtype=int)
+        team_of_participant[order] = slots
+
+        # Order teams of the same size by their lowest participant id
+        first_members = np.full(self.num_teams, self.num_participants)
+        np.minimum.at(first_members, team_of_participant, np.arange(self.num_participants))
+        new_team_nums = np.arange(self.num_teams)
+        start = 0
+        for end in range(1, self.num_teams + 1):
+            if end == self.num_teams or team_sizes[end] != team_sizes[start]:
+                teams = np.arange(start, end)
+                new_team_nums[teams[np.argsort(first_members[start:end])]] = teams
+                start = end
+        return new_team_nums[team_of_participant]
+
     # ### Team Diversity and Clustering Constraints
     #
     def population_distribution(self, attr_name):
         """Returns the percentage of each attribute value of the
         specified attribute in a mapping from value to percentage."""
-        pop_dist = (
-            self.participants[attr_name].value_counts(normalize=True).sort_index()
+        values, counts = np.unique(
+            self.participants[attr_name].to_numpy(), return_counts=True
         )
+        pop_dist = pd.Series(counts / self.num_participants, index=values)
         return pop_dist
 
     def value_count_targets(self, attr_name, team_size):
-        pop_dist = self.population_dist[attr_name]
-        targets = (pop_dist * team_size).round().astype(int)
+        """Returns the target count of each attribute value in a team of
+        the given size. There are at most two team sizes, so the targets
+        are computed once per attribute and size and then reused."""
+        key = (attr_name, team_size)
+        targets = self._count_targets.get(key)
+        if targets is None:
+            pop_dist = self.population_dist[attr_name]
+            targets = (pop_dist * team_size).round().astype(int)
+            self._count_targets[key] = targets
         return targets
 
     def create_diversity_costs(self, attr_name):
-        """Create costs variables for diversity optimization."""
+        """Create costs variables for diversity optimization.
+
+        The value counts of a team add up to the team size. When the targets
+        do too, the deviation of the last value is determined by the others,
+        so it gets no cost variable; for a two-valued attribute a single cost
+        variable per team is enough. Rounding can make the targets add up
+        to a different number, and then the last value is costed as well.
+        """
         diversity_costs = []
         num_values = len(self.attr_vals[attr_name])
-        pop_dist = self.population_dist[attr_name]
         for team_num, team_size in enumerate(self.team_sizes):
-            targets = self.value_count_targets(attr_name, team_size)
-            for val in range(num_values - 1):
+            team_costs = []
+            targets = self.value_count_targets(attr_name, team_size).to_numpy()
+            if targets.sum() == team_size:
+                num_costed = num_values - 1
+            else:
+                num_costed = num_values
+            for val in range(num_costed):
                 cost_var = self.model.NewIntVar(
                     0, team_size, f"{attr_name}_cost_{team_num}_{val}"
                 )
@@ -493,48 +697,66 @@ class TeamAssignment:
                 # self.model.add_abs_equality(
                 #     cost_var,
                 #     (self.team_value_count[attr_name][team_num][val] -
-                #      targets.iloc[val]),
+                #      targets[val]),
                 # )
-                # Work-around for bug:
+                # Work-around for bug: the cost is minimized, so bounding it
+                # from below by the difference and its negation makes it equal
+                # to the absolute difference at the optimum, with two linear
+                # constraints instead of a max.
                 diff_expr = (
                     (self.team_value_count[attr_name][team_num][val] -
-                     targets.iloc[val])
+                     int(targets[val]))
                 )
-                self.model.add_max_equality(cost_var, [diff_expr, -diff_expr])
-                diversity_costs.append(cost_var)
+                self.model.add(cost_var >= diff_expr)
+                self.model.add(cost_var >= -diff_expr)
+                team_costs.append(cost_var)
+            diversity_costs.append(team_costs)
         return diversity_costs
 
     # #### Clustering
     #
     def create_clustering_costs(self, attr_name):
-        """Create cost variables for clustering optimization."""
+        """Create cost variables for clustering optimization.
+
+        Each team picks one value, and the cost is the number of members
+        without the picked value. Rather than a max over the value counts,
+        the count of the picked value is bounded with linear constraints
+        that are only tight for the picked value; minimizing the cost then
+        makes the team pick its most common value.
+        """
         clustering_costs = []
         for team_num, team_size in enumerate(self.team_sizes):
-            max_count_var = self.model.new_int_var(
-                0, team_size, f"{attr_name}_max_count[{team_num}]"
+            value_counts = self.team_value_count[attr_name][team_num]
+            picks = [
+                self.model.new_bool_var(f"{attr_name}_pick_{val}[{team_num}]")
+                for val in range(len(value_counts))
+            ]
+            self.model.add_exactly_one(picks)
+            picked_count = self.model.new_int_var(
+                0, team_size, f"{attr_name}_picked_count[{team_num}]"
             )
+            for pick, value_count in zip(picks, value_counts):
+                # picked_count <= value_count when the value is picked
+                self.model.add(picked_count <= value_count + team_size * (1 - pick))
             cost_var = self.model.new_int_var(
                 0, team_size, f"{attr_name}_cost[{team_num}]"
             )
-            self.model.add_max_equality(
-                max_count_var, self.team_value_count[attr_name][team_num]
-            )
-            # `max_count_var` == `team_size` and `cost_var` == 0 when
-            # there is a shared value by all members of the team. To consider:
-            # do we want to reward all team members sharing more than
-            # one value which would require keeping track of all value counts
-            # that equal team size.
-            self.model.add(cost_var == (team_size - max_count_var))
-            clustering_costs.append(cost_var)
+            # `cost_var` == 0 when there is a value shared by all members
+            # of the team. To consider: do we want to reward all team members
+            # sharing more than one value which would require keeping track
+            # of all value counts that equal team size.
+            self.model.add(cost_var == (team_size - picked_count))
+            clustering_costs.append([cost_var])
         return clustering_costs
 
     # #### Numeric Clustering
     #
     def create_numeric_clustering_costs_range(self, attr_name):
         """Create costs variables for numeric clustering optimization."""
-        parti_vals = self.participants[attr_name]
+        parti_vals = self.numeric_values[attr_name]
         attr_min = int(parti_vals.min())
         attr_max = int(parti_vals.max())
+        int_vals = parti_vals.astype(int).tolist()
         numeric_clustering_costs = []
         for team_num, team_size in enumerate(self.team_sizes):
             # Create a variable for the team's min, max, range
@@ -553,24 +775,32 @@ class TeamAssignment:
                 (attr_max - attr_min),
                 f"{attr_name}_team_range_{team_num}"
             )
-            for parti_id in range(self.num_participants):
-                self.model.add(
-                    team_min <= int(parti_vals[parti_id])
-                ).only_enforce_if(self.parti_vars[parti_id]["team"][team_num])
-                self.model.add(
-                    team_max >= int(parti_vals[parti_id])
-                ).only_enforce_if(self.parti_vars[parti_id]["team"][team_num])
+            # Each participant contributes their value if they are on the
+            # team and the attribute's max (for the min) or min (for the
+            # max) otherwise, so only members set the team's min and max.
+            # These are affine in the team variable, with the smallest
+            # coefficient that works for each participant.
+            team_vars = self.team_vars[:, team_num].tolist()
+            self.model.add_min_equality(team_min, [
+                cp_model.LinearExpr.affine(team_var, val - attr_max, attr_max)
+                for val, team_var in zip(int_vals, team_vars)
+            ])
+            self.model.add_max_equality(team_max, [
+                cp_model.LinearExpr.affine(team_var, val - attr_min, attr_min)
+                for val, team_var in zip(int_vals, team_vars)
+            ])
             self.model.add(team_range == (team_max - team_min))
-            numeric_clustering_costs.append(team_range)
+            numeric_clustering_costs.append([team_range])
         return numeric_clustering_costs
 
     # #### Numeric Clustering
     #
     def create_numeric_clustering_costs_mad(self, attr_name):
         """Create costs variables for numeric clustering optimization."""
-        parti_vals = self.participants[attr_name]
+        parti_vals = self.numeric_values[attr_name]
         attr_min = int(parti_vals.min())
         attr_max = int(parti_vals.max())
+        int_vals = parti_vals.astype(int).tolist()
         attr_min_dev = 0
         attr_max_dev = attr_max - attr_min
         numeric_clustering_costs = []
@@ -581,33 +811,20 @@ class TeamAssignment:
                 attr_max,
                 f"{attr_name}_team_mean_{team_num}"
             )
-            team_attr_vals = []
             team_abs_deviations = []
             for parti_id in range(self.num_participants):
-                parti_team_val = self.model.new_int_var(
-                    min(attr_min, 0),
-                    max(attr_max, 0),
-                    f"parti_{parti_id}_team_{team_num}_{attr_name}",
-                )
-                self.model.add_multiplication_equality(
-                    parti_team_val,
-                    [
-                        self.parti_vars[parti_id]["team"][team_num],
-                        int(parti_vals[parti_id]),
-                    ]
-                )
-                team_attr_vals.append(parti_team_val)
+                team_var = self.team_vars[parti_id, team_num]
                 parti_dev = self.model.NewIntVar(
                     attr_min_dev,
                     attr_max_dev,
-                    f"{attr_name}_parti_{parti_id}_dev",
+                    f"{attr_name}_parti_{parti_id}_dev" if self.debug_names else "",
                 )
                 # Broken 9.12.4544
                 # self.model.add_abs_equality(
                 #     parti_dev,
                 #     (team_mean - parti_vals[parti_id]),
                 # )
-                diff_expr = (team_mean - int(parti_vals[parti_id]))
+                diff_expr = (team_mean - int_vals[parti_id])
                 self.model.add_max_equality(
                     parti_dev,
                     [diff_expr, -diff_expr],
@@ -615,15 +832,14 @@ class TeamAssignment:
                 maybe_parti_dev = self.model.NewIntVar(
                     min(attr_min_dev, 0),
                     max(attr_max_dev, 0),
-                    f"{attr_name}_parti_{parti_id}_maybe_dev",
+                    f"{attr_name}_parti_{parti_id}_maybe_dev" if self.debug_names else "",
                 )
-                self.model.add_multiplication_equality(
-                    maybe_parti_dev,
-                    [
-                        self.parti_vars[parti_id]["team"][team_num],
-                        parti_dev,
-                        
-                    ],
+                # maybe_parti_dev == team_var * parti_dev, written as
+                # linear constraints with attr_max_dev as the big M
+                self.model.add(maybe_parti_dev <= attr_max_dev * team_var)
+                self.model.add(maybe_parti_dev <= parti_dev)
+                self.model.add(
+                    maybe_parti_dev >= parti_dev - attr_max_dev * (1 - team_var)
                 )
                 team_abs_deviations.append(maybe_parti_dev)
             # Create a variable for the team's mean absolute deviation
@@ -634,23 +850,35 @@ class TeamAssignment:
             )
             # Set the MAD equal to the average of absolute deviations
             self.model.add(team_mad * team_size == sum(team_abs_deviations))
-            numeric_clustering_costs.append(team_mad)
+            numeric_clustering_costs.append([team_mad])
         return numeric_clustering_costs
 
     def create_difference_costs(self, attr_name):
-        """Create cost variables for attribute difference optimization."""
+        """Create cost variables for attribute difference optimization.
+
+        A team can hold at most as many participants with a value as there
+        are in the population, so values held by a single participant never
+        cost anything and are skipped, and the other cost domains are capped
+        by the value's population count.
+        """
         diff_costs = []
+        value_totals = self.attr_matrix[attr_name].sum(axis=0)
         for team_num, team_size in enumerate(self.team_sizes):
-            for value_count_var in self.team_value_count[attr_name][team_num]:
+            team_costs = []
+            value_counts = self.team_value_count[attr_name][team_num]
+            for value_count_var, value_total in zip(value_counts, value_totals):
+                max_over_1 = min(team_size, int(value_total)) - 1
+                if max_over_1 <= 0:
+                    continue
                 val_name = value_count_var.name
                 count_over_1 = self.model.new_int_var(
-                    0, team_size, f"{attr_name}_{val_name}_count_over[{team_num}]"
-                )
-                self.model.add_max_equality(
-                    count_over_1,
-                    [(value_count_var - 1), 0],
+                    0, max_over_1, f"{attr_name}_{val_name}_count_over[{team_num}]"
                 )
-                diff_costs.append(count_over_1)
+                # The cost is minimized and its domain starts at 0, so a
+                # lower bound makes it max(count - 1, 0) at the optimum.
+                self.model.add(count_over_1 >= value_count_var - 1)
+                team_costs.append(count_over_1)
+            diff_costs.append(team_costs)
         return diff_costs
     
     # ## Solving the Model
@@ -665,13 +893,80 @@ class TeamAssignment:
             solution_callback=None,
             log_progress=False,
             max_time_in_seconds=None,
+            num_search_workers=None,
+            linearization_level=None,
+            search_branching=None,
+            log_callback=None,
+            repair_hint=None,
+            cp_model_presolve=None,
+            use_lns_only=None,
+            random_seed=None,
     ):
+        """Solve the model and assign participants to teams.
+
+        Parameters left as `None` keep the CP-SAT defaults, except for
+        `num_search_workers` which defaults to the value given to the
+        constructor. The workers run CP-SAT's portfolio of diverse search
+        strategies in parallel, sharing solutions and learned bounds.
+        Presolve is single-threaded, so small models gain little from more
+        workers.
+
+        The cost variables are only bounded from below by the team
+        compositions, so the objective value and cost values of an
+        intermediate solution are upper bounds on its actual costs. Use
+        `evaluate_teams` for the exact costs of an assignment.
+
+        Args:
+            solution_callback: Callback called with each solution found
+            log_progress: Log the search progress, to stdout unless a
+                `log_callback` is given
+            max_time_in_seconds: Time limit for the search; defaults to the
+                callback's `stop_after_seconds`, if any
+            num_search_workers: Number of parallel search workers
+            linearization_level: How much of the model goes into the LP
+                relaxation (0 to 2)
+            search_branching: A `cp_model` search branching strategy such
+                as `cp_model.PORTFOLIO_SEARCH`
+            log_callback: Function called with each search log line instead
+                of printing it
+            repair_hint: Repair an infeasible solution hint (see
+                `hint_assignment`) rather than ignoring it
+            cp_model_presolve: Whether to presolve the model; turning it off
+                can save time on small models
+            use_lns_only: Only run large neighborhood search workers, to
+                find good solutions fast rather than prove optimality
+            random_seed: Seed for the solver's randomized choices, to vary
+                or reproduce a search
+        """
         self.solver = cp_model.CpSolver()
+        if max_time_in_seconds is None:
+            max_time_in_seconds = getattr(solution_callback, "stop_after_seconds", None)
         if max_time_in_seconds:
             self.solver.parameters.max_time_in_seconds = max_time_in_seconds
+        # Run CP-SAT's portfolio of search strategies (including LNS) in
+        # parallel workers.
+        self.solver.parameters.num_search_workers = (
+            num_search_workers or self.num_search_workers
+        )
+        if linearization_level is not None:
+            self.solver.parameters.linearization_level = linearization_level
+        if search_branching is not None:
+            self.solver.parameters.search_branching = search_branching
+        if repair_hint is not None:
+            self.solver.parameters.repair_hint = repair_hint
+        if cp_model_presolve is not None:
+            self.solver.parameters.cp_model_presolve = cp_model_presolve
+        if use_lns_only is not None:
+            self.solver.parameters.use_lns_only = use_lns_only
+        if random_seed is not None:
+            self.solver.parameters.random_seed = random_seed
         if log_progress:
             self.solver.parameters.log_search_progress = True
-            self.solver.parameters.log_to_stdout = True
+            if log_callback is not None:
+                self.solver.parameters.log_to_stdout = False
+                self.solver.log_callback = log_callback
+            else:
+                self.solver.parameters.log_to_stdout = True
         # This alternative is for establishing a callback for interrupting before
         # an optimal solution is found.
         self.status = self.solver.Solve(self.model, solution_callback)
@@ -681,12 +976,23 @@ class TeamAssignment:
         if not self.solution_found:
             print(f"Warning: solution was not found: {self.status}")
         else:
-            team_assignments = []
-            for id in range(self.num_participants):
-                for team_num in range(self.num_teams):
-                    if self.solver.Value(self.parti_vars[id]["team"][team_num]):
-                        team_assignments.append(team_num)
-            self.participants["team_num"] = team_assignments
+            self.team_assignments = self.team_assignments_from_solution(
+                self.solver.response_proto.solution
+            )
+            self.participants["team_num"] = self.team_assignments
+
+    def team_assignments_from_solution(self, solution):
+        """Return the team number of each participant in a solution.
+
+        `solution` holds the values of all model variables by index, as in
+        the `solution` field of a `CpSolverResponse`. The result is a numpy
+        array in participant order.
+        """
+        if self._team_var_indices is None:
+            self._team_var_indices = np.array(
+                [var.index for var in self.team_num_vars.tolist()]
+            )
+        return np.asarray(solution)[self._team_var_indices]
 
     # ## Evaluating Team Assignments
     #
@@ -700,53 +1006,55 @@ class TeamAssignment:
         if not self.solution_found:
             print("Warning: solution has not been found")
             return None
-        team_info_list = []
-        for team_num, team_size in enumerate(self.team_sizes):
-            team_partis = self.participants[
-                self.participants["team_num"] == team_num
-            ]
-            team_info = {
-                "team_num": team_num,
-                "team_size": team_size,
-            }
-            for attr_name in self.attr_constraints:
-                ct_type = self.attr_constraints[attr_name]["type"]
-                if ct_type == self.CT_DIVERSIFY:
-                    pop_targets = self.value_count_targets(attr_name, team_size)
-                    team_counts = team_partis[attr_name].value_counts().sort_index()
-                    missed = (
-                        (pop_targets - team_counts)
-                        .fillna(0)
-                        # Only need of one pos/neg pair
-                        .pipe(lambda x: x[x > 0])
-                        .sum()
-                        .astype(int)
-                    )
-                    team_info[attr_name] = missed
-                elif ct_type == self.CT_CLUSTER:
-                    max_count = max_attr_value_count(team_partis[attr_name])
-                    missed = team_size - max_count
-                elif ct_type == self.CT_CLUSTER_NUMERIC:
-                    missed = (team_partis[attr_name].max() - team_partis[attr_name].min())
-                elif ct_type == self.CT_DIFFERENT:
-                    missed = team_size - team_partis[attr_name].nunique()
-                team_info[attr_name] = missed
-            team_info_list.append(team_info)
-        team_info = pd.DataFrame(team_info_list)
+        team_nums = self.participants["team_num"]
+        grouped = self.participants.groupby("team_num")
+        team_info = pd.DataFrame({
+            "team_num": range(self.num_teams),
+            "team_size": self.team_sizes,
+        })
+        for attr_name in self.attr_constraints:
+            ct_type = self.attr_constraints[attr_name]["type"]
+            if ct_type == self.CT_DIVERSIFY:
+                pop_targets = np.stack([
+                    self.value_count_targets(attr_name, team_size).to_numpy()
+                    for team_size in self.team_sizes
+                ])
+                # Count each value per team in the population value order
+                value_index = self.population_dist[attr_name].index
+                value_codes = value_index.get_indexer(self.participants[attr_name])
+                team_counts = np.zeros_like(pop_targets)
+                np.add.at(team_counts, (team_nums.to_numpy(), value_codes), 1)
+                # Only need of one pos/neg pair
+                missed = np.clip(pop_targets - team_counts, 0, None).sum(axis=1)
+            elif ct_type == self.CT_CLUSTER:
+                max_count = max_attr_value_counts(
+                    team_nums, self.participants[attr_name], self.num_teams
+                )
+                missed = team_info["team_size"] - max_count
+            elif ct_type == self.CT_CLUSTER_NUMERIC:
+                missed = grouped[attr_name].max() - grouped[attr_name].min()
+            elif ct_type == self.CT_DIFFERENT:
+                missed = team_info["team_size"] - grouped[attr_name].nunique()
+            team_info[attr_name] = missed
         return team_info
 
 
 class SolutionCallback(cp_model.CpSolverSolutionCallback):
-    def __init__(self, stop_after_seconds=None):
+    """Print each solution found, unless `verbose` is false.
+
+    `stop_after_seconds` is used by `TeamAssignment.solve` as the solver's
+    time limit when no `max_time_in_seconds` is given, so the search stops
+    on time even when no new solutions are being found.
+    """
+
+    def __init__(self, stop_after_seconds=None, verbose=True):
         cp_model.CpSolverSolutionCallback.__init__(self)
         self.stop_after_seconds = stop_after_seconds
+        self.verbose = verbose
 
     def on_solution_callback(self):
-        print(f"{self.wall_time=}, {self.objective_value=}, {self.num_conflicts=}")
-        if (self.stop_after_seconds and
-            (self.wall_time > self.stop_after_seconds)):
-            print(f"Stopping search after {self.wall_time} seconds")
-            self.stop_search()
+        if self.verbose:
+            print(f"{self.wall_time=}, {self.objective_value=}, {self.num_conflicts=}")
 
 # ## Functions
 #
@@ -792,11 +1100,16 @@ def calc_team_sizes(pop_size, target_size, less_than=True):
 # of boolean attributes, one for each attribute value.
 
 
+_NON_WORD = re.compile(r"\W")
+_MULTI_UNDERSCORE = re.compile(r"_+")
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
 def make_attr_value_name(attr_name, cat_value, verb):
     """Create simplified attribute value name"""
     cat_value_str = str(cat_value)
-    all_alpha = re.sub(r"\W", "_", cat_value_str).lower()
-    val_name = re.sub(r"_+", "_", all_alpha)
+    all_alpha = _NON_WORD.sub("_", cat_value_str).lower()
+    val_name = _MULTI_UNDERSCORE.sub("_", all_alpha)
     attr_val_name = f"{attr_name}_{verb}_{val_name}"
     return attr_val_name
 
@@ -816,12 +1129,49 @@ def categories_to_bool_vars(attr_name, cat_values):
     return val_names
 
 
+def attr_value_matrix(attr_name, cat_values, val_names):
+    """Return a boolean matrix of which participants have which values.
+
+    The matrix has a row for each participant and a column for each name in
+    `val_names` (from `categories_to_bool_vars`). List values are exploded
+    so each participant row is marked for every value in its list.
+    """
+    cat_values = cat_values.reset_index(drop=True)
+    is_list = cat_values.map(lambda v: isinstance(v, list)).to_numpy()
+    exploded = cat_values.explode()
+    rows = exploded.index.to_numpy()
+    verbs = np.where(is_list[rows], "has", "is")
+    # Distinct values can simplify to the same name, which then matches
+    # every column with that name.
+    name_columns = {}
+    for col, name in enumerate(val_names):
+        name_columns.setdefault(name, []).append(col)
+    # Look up the columns of each distinct value once rather than once
+    # per participant; empty lists explode to NaN and match no column.
+    value_columns = {}
+    matrix = np.zeros((len(cat_values), len(val_names)), dtype=bool)
+    for row, value, verb in zip(rows.tolist(), exploded.tolist(), verbs.tolist()):
+        cols = value_columns.get((value, verb))
+        if cols is None:
+            name = make_attr_value_name(attr_name, value, verb)
+            cols = value_columns[(value, verb)] = name_columns.get(name, [])
+        matrix[row, cols] = True
+    return matrix
+
+
 # ## Evaluating Team Assignments
 #
-def max_attr_value_count(team_vals):
-    if isinstance(team_vals.iloc[0], list):
-        attr_vals = chain.from_iterable(team_vals)
-    else:
-        attr_vals = team_vals
-    max_count = max(Counter(attr_vals).values())
-    return max_count
+def max_attr_value_counts(team_nums, attr_vals, num_teams):
+    """Return the count of the most common attribute value in each team.
+
+    List values are exploded so each value in a participant's list is
+    counted. The result is a NumPy array indexed by team number.
+    """
+    attr_vals = pd.Series(attr_vals).reset_index(drop=True).explode()
+    # Empty lists explode to NaN, which gets the code -1
+    codes, uniques = pd.factorize(attr_vals)
+    teams = np.asarray(team_nums)[attr_vals.index.to_numpy()]
+    found = codes >= 0
+    counts = np.zeros((num_teams, len(uniques)), dtype=int)
+    np.add.at(counts, (teams[found], codes[found]), 1)
+    return counts.max(axis=1)
@@ -1,63 +1,88 @@
 import streamlit as st
 import pandas as pd
-import datetime
+import orjson
+import hashlib
+import io
+import os
+from collections import OrderedDict
 from threading import Thread, Event
-import time
 import threading
 
 import team_formation
 from team_assignment import TeamAssignment, SolutionCallback
-from team_formation.working_time import working_times_hours
-from ortools.sat.python import cp_model
+from team_formation.working_time import working_times_hour_lists
 
 # Handle working time in the roster download
 ENABLE_WORKING_TIME = False
 
+# Parse uploaded constraints CSV files with the multithreaded Arrow reader
+# (pyarrow is a Streamlit dependency). Rosters keep the default C parser:
+# the Arrow reader turns free-text values that look like dates into
+# timestamps, which would change the category values in the model.
+CSV_ENGINE = "pyarrow"
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_roster(file_bytes, file_type):
+    """Parse an uploaded roster; cached so re-uploading a file is free."""
+    if file_type == "text/csv":
+        return (pd.read_csv(io.BytesIO(file_bytes))
+                .pipe(create_list_columns))
+    elif file_type == "application/json":
+        return read_json_upload(file_bytes)
+
+def read_json_upload(file_bytes):
+    """Parse a JSON upload, a list of records with orjson when possible."""
+    payload = orjson.loads(file_bytes)
+    if isinstance(payload, list):
+        return pd.DataFrame(payload)
+    return pd.read_json(io.BytesIO(file_bytes))
+
 def roster_upload_callback():
     roster_upload = st.session_state["roster_upload"]
-    if roster_upload.type == "text/csv":
-         roster = (pd.read_csv(roster_upload)
-                   .pipe(create_list_columns))
-    elif roster_upload.type == "application/json":
-        roster = pd.read_json(roster_upload)
+    roster = parse_roster(roster_upload.getvalue(), roster_upload.type)
     st.session_state["roster"] = roster
 
 def create_list_columns(df):
-    new_df = df.copy()
+    # Only the list columns are replaced, so the others can be shared
+    new_df = df.copy(deep=False)
     for list_col in (col for col in df.columns
                      if col.endswith("_list")):
-        new_df[list_col] = split_list_column(new_df[list_col])
+        new_df[list_col] = split_list_column(df[list_col])
     return new_df
 
 def split_list_column(series):
-    new_series = series.map(lambda str_val: str_val.split(";"))
-    return new_series
+    return series.str.split(";")
 
 def constraints_are_valid():
     valid = True
     constraints = st.session_state["constraints"]
-    constraint_columns = constraints.columns
+    constraint_columns = set(constraints.columns)
     required_columns = ["attribute", "type", "weight"]
     for req_col in required_columns:
         if req_col not in constraint_columns:
             st.error(f"Constraints missing required column: '{req_col}'")
             valid = False
-    if "roster" in st.session_state:
-        roster = st.session_state["roster"]
-        attributes = list(constraints["attribute"])
-        roster_columns = list(roster.columns)
-        for attribute in attributes:
-            if attribute not in roster_columns:
-                st.error(f"Constraint does not exist as roster column: '{attribute}'")
-                valid = False
+    if "roster" in st.session_state and "attribute" in constraint_columns:
+        roster_columns = set(st.session_state["roster"].columns)
+        missing = [attribute for attribute in constraints["attribute"]
+                   if attribute not in roster_columns]
+        if missing:
+            missing_list = ", ".join(f"'{attribute}'" for attribute in missing)
+            st.error(f"Constraints do not exist as roster columns: {missing_list}")
+            valid = False
     return valid
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_constraints(file_bytes, file_type):
+    """Parse an uploaded constraints file; cached like `parse_roster`."""
+    if file_type == "text/csv":
+        return pd.read_csv(io.BytesIO(file_bytes), engine=CSV_ENGINE)
+    elif file_type == "application/json":
+        return read_json_upload(file_bytes)
+
 def constraints_upload_callback():
     constraints_upload = st.session_state["constraints_upload"]
-    if constraints_upload.type == "text/csv":
-         constraints = pd.read_csv(constraints_upload)
-    elif constraints_upload.type == "application/json":
-        constraints = pd.read_json(constraints_upload)
+    constraints = parse_constraints(constraints_upload.getvalue(), constraints_upload.type)
     st.session_state["constraints"] = constraints
     constraints_are_valid()
 
@@ -72,21 +97,31 @@ class ProgressTracker:
     def __init__(self):
         self.lock = threading.Lock()
         self.solution_count = 0
-        self.best_objective = float('inf')
+        # None until the first solution is found
+        self.best_objective = None
         self.wall_time = 0.0
         self.num_conflicts = 0
         self.is_running = False
         self.is_complete = False
         self.success = False
+        # Set whenever there is something new for the UI to show
+        self.updated = Event()
 
     def update(self, solution_count, objective_value, wall_time, num_conflicts):
         """Update progress data in a thread-safe manner."""
         with self.lock:
             self.solution_count = solution_count
-            if objective_value < self.best_objective:
+            # The team assignment model minimizes its cost
+            if self.best_objective is None or objective_value < self.best_objective:
                 self.best_objective = objective_value
             self.wall_time = wall_time
             self.num_conflicts = num_conflicts
+        self.updated.set()
+
+    def wait_for_update(self, timeout=None):
+        """Block until the next update (or completion) or the timeout."""
+        self.updated.wait(timeout=timeout)
+        self.updated.clear()
 
     def get_status(self):
         """Get current status in a thread-safe manner."""
@@ -110,20 +145,18 @@ class ProgressTracker:
             self.is_complete = True
             self.is_running = False
             self.success = success
+        self.updated.set()
 
 
 class StreamlitSolutionCallback(SolutionCallback):
     """Solution callback that tracks progress without directly updating UI."""
 
     def __init__(self, progress_tracker, stop_after_seconds=None):
-        super().__init__(stop_after_seconds=stop_after_seconds)
+        super().__init__(stop_after_seconds=stop_after_seconds, verbose=False)
         self.progress_tracker = progress_tracker
         self.solution_count = 0
 
     def on_solution_callback(self):
-        # Call parent implementation for stdout logging and stop logic
-        super().on_solution_callback()
-
         # Update progress tracker (thread-safe)
         self.solution_count += 1
         self.progress_tracker.update(
@@ -133,34 +166,124 @@ class StreamlitSolutionCallback(SolutionCallback):
             self.num_conflicts
         )
 
-def solver_worker(ta, callback, progress_tracker, max_time):
+def solver_worker(ta, callback, progress_tracker, max_time, **solve_kwargs):
     """Run the solver in a separate thread."""
     progress_tracker.set_running(True)
     try:
         ta.solve(
             solution_callback=callback,
             max_time_in_seconds=max_time,
+            **solve_kwargs,
         )
         progress_tracker.set_complete(ta.solution_found)
     except Exception as e:
         progress_tracker.set_complete(False)
         raise e
         
+# Number of solved team assignments kept for identical inputs
+SOLVE_CACHE_SIZE = 8
+
+@st.cache_resource
+def solved_team_assignments():
+    """Solved team assignments by `solve_cache_key`, kept across reruns."""
+    return OrderedDict()
+
+def solve_cache_key(roster, constraints, *solve_args):
+    """Key the inputs of a solve by the contents of the roster and constraints.
+
+    The roster is stored sorted by team after a solve, so the previous team
+    numbers are dropped and the original participant order restored first.
+    """
+    roster = roster.drop(columns="team_num", errors="ignore").sort_index()
+    digest = hashlib.sha256()
+    digest.update(roster.to_csv().encode("utf-8"))
+    digest.update(constraints.to_csv().encode("utf-8"))
+    return (digest.hexdigest(),) + solve_args
+
+def store_team_results(team_assignment):
+    """Keep the teams, download file and evaluation of a solved assignment."""
+    st.session_state["team_assignment"] = team_assignment
+    st.session_state["solution_found"] = True
+    roster_teams = (team_assignment
+                    .participants
+                    .sort_values("team_num"))
+    st.session_state["roster"] = roster_teams
+    # Write the CSV as UTF-8 bytes directly, without a str copy
+    roster_csv = io.BytesIO()
+    roster_teams.to_csv(roster_csv, index=False, encoding="utf-8")
+    st.session_state["roster_csv"] = roster_csv.getvalue()
+    st.session_state["team_eval"] = team_assignment.evaluate_teams()
+    st.session_state["prior_team_assignment"] = pd.Series(
+        team_assignment.team_assignments, index=team_assignment.participants.index
+    )
+
+# Rosters smaller than this skip the single-threaded presolve when the
+# presolve setting is "Auto"
+SMALL_ROSTER_SIZE = 40
+
+def solver_tuning(team_assignment):
+    """Solver parameters from the advanced solver tuning settings."""
+    presolve = st.session_state.get("presolve", "Auto")
+    if presolve == "Auto":
+        cp_model_presolve = team_assignment.num_participants >= SMALL_ROSTER_SIZE
+    else:
+        cp_model_presolve = (presolve == "On")
+    linearization_level = st.session_state.get("linearization_level", "Default")
+    return dict(
+        cp_model_presolve=cp_model_presolve,
+        use_lns_only=st.session_state.get("use_lns_only", False),
+        linearization_level=(None if linearization_level == "Default"
+                             else linearization_level),
+    )
+
 def generate_teams_callback():
     if not constraints_are_valid():
         return
     less_than_target = (st.session_state["over_under_size"] == "Under")
     print("Generating teams with constraints:")
     print(st.session_state["constraints"])
+
+    # Identical inputs give the previous teams without searching again
+    solved = solved_team_assignments()
+    cache_key = solve_cache_key(
+        st.session_state["roster"],
+        st.session_state["constraints"],
+        st.session_state["target_team_size"],
+        less_than_target,
+        st.session_state["stop_after_seconds"],
+        st.session_state["num_search_workers"],
+        st.session_state.get("presolve", "Auto"),
+        st.session_state.get("use_lns_only", False),
+        st.session_state.get("linearization_level", "Default"),
+    )
+    cached = solved.get(cache_key)
+    if cached is not None:
+        solved.move_to_end(cache_key)
+        store_team_results(cached)
+        st.success("✅ Reused the teams generated for these settings.")
+        return
+
     team_assignment = TeamAssignment(
         st.session_state["roster"],
         st.session_state["constraints"],
         st.session_state["target_team_size"],
         less_than_target=less_than_target,
+        num_search_workers=st.session_state["num_search_workers"],
     )
     st.session_state["team_assignment"] = team_assignment
     stop_after_seconds = st.session_state["stop_after_seconds"]
 
+    # Start from the previous teams of the same participants, which are
+    # usually close to the new optimum after a constraint edit
+    repair_hint = None
+    prior_teams = st.session_state.get("prior_team_assignment")
+    roster_index = team_assignment.participants.index
+    if (prior_teams is not None
+            and prior_teams.max() < team_assignment.num_teams
+            and prior_teams.index.sort_values().equals(roster_index.sort_values())):
+        team_assignment.hint_assignment(prior_teams.reindex(roster_index).to_numpy())
+        repair_hint = True
+
     # Create progress tracker and callback
     progress_tracker = ProgressTracker()
     callback = StreamlitSolutionCallback(
@@ -174,7 +297,8 @@ def generate_teams_callback():
     # Start solver in background thread
     solver_thread = Thread(
         target=solver_worker,
-        args=(team_assignment, callback, progress_tracker, stop_after_seconds)
+        args=(team_assignment, callback, progress_tracker, stop_after_seconds),
+        kwargs=dict(repair_hint=repair_hint, **solver_tuning(team_assignment)),
     )
     solver_thread.start()
 
@@ -191,11 +315,14 @@ def generate_teams_callback():
 
         if status['is_running']:
             # Update progress display
+            best_objective = status['best_objective']
+            if best_objective is None:
+                best_objective = "—"
             with status_container:
                 st.markdown(f"""
                 **Search Progress:**
                 - Solutions found: {status['solution_count']}
-                - Best objective: {status['best_objective']}
+                - Best objective: {best_objective}
                 - Elapsed time: {status['wall_time']:.1f}s
                 - Conflicts: {status['num_conflicts']}
                 """)
@@ -209,8 +336,9 @@ def generate_teams_callback():
                         text=f"Searching... ({status['wall_time']:.1f}s / {stop_after_seconds}s)"
                     )
 
-        # Sleep briefly to avoid busy waiting
-        time.sleep(0.5)
+        # Wait for the next solution or completion; the timeout keeps the
+        # elapsed time display moving when solutions are sparse
+        progress_tracker.wait_for_update(timeout=1.0)
 
     # Wait for thread to complete
     solver_thread.join()
@@ -218,14 +346,10 @@ def generate_teams_callback():
     # Handle completion
     final_status = progress_tracker.get_status()
     if final_status['success']:
-        st.session_state["solution_found"] = True
-        roster_teams = (team_assignment
-                        .participants
-                        .sort_values("team_num"))
-        st.session_state["roster"] = roster_teams
-        roster_csv = roster_teams.to_csv(index=False).encode("utf-8")
-        st.session_state["roster_csv"] = roster_csv
-        st.session_state["team_eval"] = team_assignment.evaluate_teams()
+        store_team_results(team_assignment)
+        solved[cache_key] = team_assignment
+        while len(solved) > SOLVE_CACHE_SIZE:
+            solved.popitem(last=False)
 
         # Clear progress containers and show completion
         progress_container.empty()
@@ -240,13 +364,12 @@ def translate_working_time():
     ref_date = st.session_state["reference_date"]
     time_zone_column = st.session_state["time_zone_column"]
     preferred_time_column = st.session_state["preferred_time_column"]
-    roster["working_hour_list"] = working_times_hours(
+    roster["working_hour_list"] = working_times_hour_lists(
         roster,
         ref_date,
         time_zone_column,
         preferred_time_column,
     )
-    roster["working_hour_list"] = split_list_column(roster["working_hour_list"])
     st.session_state["roster"] = roster
 
 st.set_page_config(
@@ -371,6 +494,23 @@ with setup_1:
                     value=60,
                     min_value=1,
                     key="stop_after_seconds")
+    st.number_input("Solver workers",
+                    value=min(8, os.cpu_count() or 1),
+                    min_value=1,
+                    key="num_search_workers",
+                    help="Presolve is single-threaded; the search uses all workers.")
+    with st.expander("Advanced solver tuning"):
+        st.selectbox("Presolve",
+                     options=["Auto", "On", "Off"],
+                     key="presolve",
+                     help=f"Auto skips presolve for rosters under {SMALL_ROSTER_SIZE} participants.")
+        st.checkbox("Large neighborhood search only",
+                    value=False,
+                    key="use_lns_only",
+                    help="Finds good solutions fast but cannot prove optimality.")
+        st.select_slider("Linearization level",
+                         options=["Default", 0, 1, 2],
+                         key="linearization_level")
 
 with setup_2:    
     st.file_uploader("Participant roster",
@@ -1,4 +1,5 @@
 import datetime
+import functools
 from zoneinfo import ZoneInfo
 
 WORKING_HOURS = {
@@ -11,34 +12,53 @@ INTERVAL_SEPARATOR = ";"
 
 def working_times_hours(df, ref_date, time_zone_col, pref_time_col):
     """Convert specified columns to UTC start hours."""
-    hours_list = []
-    for i, row in df.iterrows():
-        time_zone = row[time_zone_col]
-        working_time = row[pref_time_col]
-        hours = working_time_hours(time_zone, working_time, ref_date)
-        hours_str = INTERVAL_SEPARATOR.join(str(h) for h in hours)
-        hours_list.append(hours_str)
+    return [
+        INTERVAL_SEPARATOR.join(map(str, hours))
+        for hours in working_times_hour_lists(df, ref_date, time_zone_col, pref_time_col)
+    ]
+
+def working_times_hour_lists(df, ref_date, time_zone_col, pref_time_col):
+    """Convert specified columns to lists of UTC start hours, ready to use
+    as a list column without joining and splitting strings."""
+    hours_list = [None] * len(df)
+    rows = zip(df[time_zone_col].to_numpy(), df[pref_time_col].to_numpy())
+    for i, (time_zone, working_time) in enumerate(rows):
+        hours_list[i] = list(working_time_hours(time_zone, working_time, ref_date))
     return hours_list
 
+@functools.lru_cache(maxsize=4096)
 def working_time_hours(time_zone, working_times, ref_date):
-    """Convert a time zone and string of working times into UTC start hours."""
+    """Convert a time zone and string of working times into UTC start hours.
+
+    Rosters repeat the same time zone and working times for many
+    participants, so results are cached; the hours are returned as a tuple
+    so the cached value cannot be changed.
+    """
+    return utc_hours(utc_offset_minutes(time_zone, ref_date), working_times)
+
+@functools.lru_cache(maxsize=1024)
+def utc_offset_minutes(time_zone, ref_date):
+    """Return the UTC offset of a time zone during working hours on a date.
+
+    The offset is taken at local noon on `ref_date` and used for every
+    working hour of that day. Daylight saving time changes happen at night,
+    so on the day of a change the offset at noon is the new one, which is
+    also what converting each working hour on its own would give.
+    """
     # Discard the first UTC part of the time zone if present
     if time_zone.startswith("(UTC"):
         time_zone = time_zone.split()[1]
-    hour_list = []
-    for wt in working_times.split("; "):
-        wt_hours = WORKING_HOURS[wt]
-        for wt_hour in wt_hours:
-            wt_start_local = datetime.datetime(
-                ref_date.year,
-                ref_date.month,
-                ref_date.day,
-                wt_hour,
-                0,
-                0,
-                tzinfo=ZoneInfo(time_zone)
-            )
-            wt_start_utc = wt_start_local.astimezone(datetime.timezone.utc)
-            hour_utc = wt_start_utc.hour
-            hour_list.append(hour_utc)
-    return hour_list
+    noon = datetime.datetime.combine(
+        ref_date, datetime.time(12), tzinfo=ZoneInfo(time_zone)
+    )
+    return int(noon.utcoffset().total_seconds()) // 60
+
+def utc_hours(offset_minutes, working_times):
+    """Convert a string of working times into UTC start hours, given the
+    UTC offset in minutes of the local time."""
+    # Floor to the UTC hour, as for offsets like +05:30
+    return tuple(
+        (wt_hour * 60 - offset_minutes) // 60 % 24
+        for wt in working_times.split("; ")
+        for wt_hour in WORKING_HOURS[wt]
+    )
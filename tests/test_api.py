@@ -1,20 +1,55 @@
 """Tests for the FastAPI team formation API."""
 
+import asyncio
 import json
+import re
+import numpy as np
+import orjson
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
 
-from team_formation.api.main import app
+from team_formation.api import main
+from team_formation.api.main import (
+    app,
+    convert_constraints_to_dataframe,
+    convert_result_to_response,
+    load_static_files,
+    static_file_response,
+)
+from team_formation.api.callbacks import ProgressChannel, encode_progress, progress_event
+from team_formation.api.model_cache import ModelCache
 from team_formation.api.models import (
     TeamAssignmentRequest,
     ConstraintInput,
 )
 
 
-@pytest.fixture
+def parse_sse(response):
+    """Read a server-sent event stream into a list of event type and data dicts."""
+    events = []
+    for frame in re.split(rb"\r?\n\r?\n", response.read()):
+        fields = dict(
+            line.split(b": ", 1) for line in frame.splitlines()
+            if line and not line.startswith(b":")
+        )
+        if b"data" in fields:
+            events.append({
+                "type": fields[b"event"].decode(),
+                "data": orjson.loads(fields[b"data"]),
+            })
+    return events
+
+
+@pytest.fixture(scope="module")
 def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
+    """Create a test client for the FastAPI app, shared by the module's tests.
+
+    The endpoints keep no per-request state, so one client (and one run of
+    the app lifespan) serves every test.
+    """
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -67,14 +102,10 @@ def test_assign_teams_valid_request(client, sample_request_data):
     with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
         assert response.status_code == 200
         assert "text/event-stream" in response.headers["content-type"]
+        assert response.headers["x-accel-buffering"] == "no"
+        assert response.headers["cache-control"] == "no-store"
 
-        events = []
-        for line in response.iter_lines():
-            if line.startswith("event:"):
-                event_type = line.split(":", 1)[1].strip()
-            elif line.startswith("data:"):
-                data = line.split(":", 1)[1].strip()
-                events.append({"type": event_type, "data": json.loads(data)})
+        events = parse_sse(response)
 
         # Should have at least one event (could be progress or complete)
         assert len(events) > 0
@@ -99,6 +130,24 @@ def test_assign_teams_valid_request(client, sample_request_data):
         assert result["stats"]["num_teams"] == 3  # 9 participants / 3 team size
 
 
+def test_assign_teams_process_pool(sample_request_data):
+    """Test team assignment solved in a worker process."""
+    sample_request_data["use_process_pool"] = True
+    sample_request_data["max_time"] = 5
+
+    # Use the client as a context manager so the lifespan shuts down the pool
+    with TestClient(app) as client:
+        with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
+            assert response.status_code == 200
+
+            events = parse_sse(response)
+
+    assert events[-1]["type"] == "complete"
+    result = events[-1]["data"]
+    assert len(result["participants"]) == 9
+    assert result["stats"]["num_teams"] == 3
+
+
 def test_pydantic_model_validation():
     """Test Pydantic model validation."""
     # Valid constraint
@@ -156,6 +205,36 @@ def test_assign_teams_nonexistent_constraint_attribute(client, sample_request_da
     assert response.status_code == 422  # Unprocessable Entity
 
 
+def test_assign_teams_too_few_participants(client, sample_request_data):
+    """Test that requests with fewer participants than a team are rejected."""
+    sample_request_data["participants"] = sample_request_data["participants"][:2]
+
+    response = client.post("/api/assign_teams", json=sample_request_data)
+    assert response.status_code == 400
+    assert "Not enough participants" in response.json()["detail"]
+
+
+def test_assign_teams_too_few_participants_less_than_target(client, sample_request_data):
+    """Test that a short roster forms one smaller team with less_than_target."""
+    sample_request_data["participants"] = sample_request_data["participants"][:2]
+    sample_request_data["less_than_target"] = True
+
+    with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
+        assert response.status_code == 200
+        events = parse_sse(response)
+
+    assert any(event["type"] == "complete" for event in events)
+
+
+def test_assign_teams_duplicate_ids(client, sample_request_data):
+    """Test that duplicate participant ids are rejected."""
+    sample_request_data["participants"][1]["id"] = sample_request_data["participants"][0]["id"]
+
+    response = client.post("/api/assign_teams", json=sample_request_data)
+    assert response.status_code == 400
+    assert "unique" in response.json()["detail"]
+
+
 def test_assign_teams_empty_participants(client):
     """Test that empty participants list is rejected."""
     request_data = {
@@ -177,13 +256,7 @@ def test_assign_teams_with_time_limit(client, sample_request_data):
     with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
         assert response.status_code == 200
 
-        events = []
-        for line in response.iter_lines():
-            if line.startswith("event:"):
-                event_type = line.split(":", 1)[1].strip()
-            elif line.startswith("data:"):
-                data = line.split(":", 1)[1].strip()
-                events.append({"type": event_type, "data": json.loads(data)})
+        events = parse_sse(response)
 
         # Should complete (successfully or with error)
         assert len(events) > 0
@@ -197,22 +270,17 @@ def test_assign_teams_progress_events(client, sample_request_data):
         progress_events = []
         complete_events = []
 
-        for line in response.iter_lines():
-            if line.startswith("event:"):
-                event_type = line.split(":", 1)[1].strip()
-            elif line.startswith("data:"):
-                data = line.split(":", 1)[1].strip()
-                event_data = json.loads(data)
-
-                if event_type == "progress":
-                    progress_events.append(event_data)
-                    # Check progress event structure
-                    assert "solution_count" in event_data
-                    assert "objective_value" in event_data
-                    assert "wall_time" in event_data
-                    assert "message" in event_data
-                elif event_type == "complete":
-                    complete_events.append(event_data)
+        for event in parse_sse(response):
+            event_data = event["data"]
+            if event["type"] == "progress":
+                progress_events.append(event_data)
+                # Check progress event structure
+                assert "solution_count" in event_data
+                assert "objective_value" in event_data
+                assert "wall_time" in event_data
+                assert "message" in event_data
+            elif event["type"] == "complete":
+                complete_events.append(event_data)
 
         # Should have at least one complete event
         assert len(complete_events) >= 1
@@ -223,6 +291,35 @@ def test_assign_teams_progress_events(client, sample_request_data):
                 assert progress_events[i]["solution_count"] <= progress_events[i + 1]["solution_count"]
 
 
+def test_assign_teams_stream_assignments(client, sample_request_data):
+    """Test that progress events can include intermediate team assignments."""
+    sample_request_data["stream_assignments"] = True
+
+    with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
+        events = parse_sse(response)
+
+    progress_events = [e["data"] for e in events if e["type"] == "progress"]
+    assert progress_events
+    # The first solution is always sent with its assignments
+    team_assignments = progress_events[0]["team_assignments"]
+    assert len(team_assignments) == 9
+    assert sorted(set(team_assignments)) == [0, 1, 2]
+
+
+def test_assign_teams_chunked_result(client, sample_request_data):
+    """Test that the result can be sent as one event per participant."""
+    sample_request_data["chunked_result"] = True
+
+    with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
+        events = parse_sse(response)
+
+    types = [e["type"] for e in events if e["type"] != "progress"]
+    assert types == ["complete_header"] + ["participant"] * 9 + ["complete_footer"]
+    assert events[-1]["data"]["num_participants"] == 9
+    participants = [e["data"] for e in events if e["type"] == "participant"]
+    assert all("team_number" in p for p in participants)
+
+
 def test_assign_teams_with_list_attributes(client):
     """Test team assignment with list-valued attributes."""
     request_data = {
@@ -245,13 +342,7 @@ def test_assign_teams_with_list_attributes(client):
     with client.stream("POST", "/api/assign_teams", json=request_data) as response:
         assert response.status_code == 200
 
-        events = []
-        for line in response.iter_lines():
-            if line.startswith("event:"):
-                event_type = line.split(":", 1)[1].strip()
-            elif line.startswith("data:"):
-                data = line.split(":", 1)[1].strip()
-                events.append({"type": event_type, "data": json.loads(data)})
+        events = parse_sse(response)
 
         # Should complete successfully
         last_event = events[-1]
@@ -296,3 +387,162 @@ def test_request_model_validation():
             ],
             target_team_size=3,
         )
+
+    # Every missing attribute is reported at once
+    with pytest.raises(ValueError, match="'missing_a', 'missing_b' do not exist"):
+        TeamAssignmentRequest(
+            participants=[
+                {"id": 1, "name": "Alice"},
+                {"id": 2, "name": "Bob"},
+            ],
+            constraints=[
+                {"attribute": "missing_a", "type": "diversify", "weight": 1},
+                {"attribute": "name", "type": "different", "weight": 1},
+                {"attribute": "missing_b", "type": "cluster", "weight": 1},
+            ],
+            target_team_size=3,
+        )
+
+
+def test_model_cache_reuses_model(sample_request_data):
+    """Test that identical problems share a cached model."""
+    request = TeamAssignmentRequest(**sample_request_data)
+    constraints_df = convert_constraints_to_dataframe(request)
+    cache = ModelCache(maxsize=1)
+
+    first = cache.team_assignment(request.participants, constraints_df, 3, False)
+    second = cache.team_assignment(request.participants, constraints_df, 3, False)
+    assert second.team_vars is first.team_vars
+    assert second.model is not first.model
+
+    # A different target team size needs a different model
+    third = cache.team_assignment(request.participants, constraints_df, 4, False)
+    assert third.team_vars is not first.team_vars
+
+
+def test_convert_result_to_response():
+    """Test that team numbers are added to copies of the participant dicts."""
+    participants = [
+        {"id": 1, "score": 1.5, "name": "a"},
+        {"id": 2, "score": None, "name": None},
+        {"id": 3, "nickname": "c"},
+    ]
+
+    result = convert_result_to_response(
+        participants, np.array([0, 1, 0]), num_teams=2, solution_count=1, wall_time=0.5
+    )
+
+    # Missing attributes are filled in with None, as for a DataFrame
+    assert result["participants"] == [
+        {"id": 1, "score": 1.5, "name": "a", "nickname": None, "team_number": 0},
+        {"id": 2, "score": None, "name": None, "nickname": None, "team_number": 1},
+        {"id": 3, "score": None, "name": None, "nickname": "c", "team_number": 0},
+    ]
+    assert "team_number" not in participants[0]
+    assert result["stats"]["num_teams"] == 2
+
+
+def test_encode_progress_matches_event():
+    """Test that the progress template encodes the same JSON as the event dict."""
+    progress = (43, 113.0, 1.986206415, 157, None)
+    assert json.loads(encode_progress(progress)) == progress_event(progress)
+
+    progress = (2, 7.5, 0.25, 0, np.array([0, 1, 0]))
+    assert json.loads(encode_progress(progress))["team_assignments"] == [0, 1, 0]
+
+
+def test_static_file_cache(tmp_path):
+    """Test that frontend files are served from memory with ETags and gzip."""
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<html></html>")
+    (tmp_path / "assets" / "app.js").write_text("console.log('team formation');\n" * 100)
+
+    files = load_static_files(tmp_path)
+    assert set(files) == {"index.html", "assets/app.js"}
+    app_js = files["assets/app.js"]
+    assert app_js.media_type in ("text/javascript", "application/javascript")
+    assert app_js.gzip_body is not None
+    # Small files are not worth compressing
+    assert files["index.html"].gzip_body is None
+
+    def request(headers):
+        return Request({
+            "type": "http",
+            "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+        })
+
+    response = static_file_response(app_js, request({"accept-encoding": "gzip"}), "no-cache")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.body == app_js.gzip_body
+
+    response = static_file_response(app_js, request({"if-none-match": app_js.etag}), "no-cache")
+    assert response.status_code == 304
+
+
+def test_gzip_skips_event_stream(client, sample_request_data):
+    """Test that large responses are compressed but the event stream is not."""
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+    with client.stream("POST", "/api/assign_teams", json=sample_request_data) as response:
+        assert response.headers["content-encoding"] == "identity"
+
+
+def test_health_probes(client, monkeypatch):
+    """Test the liveness and readiness probes."""
+    assert client.get("/health/live").json() == {"status": "healthy"}
+    assert client.get("/health/ready").status_code == 200
+
+    # Not ready while all solve slots are taken
+    monkeypatch.setattr(main, "_inflight_solves", main.MAX_CONCURRENT_SOLVES)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "busy"}
+    assert client.get("/health/live").status_code == 200
+
+
+def test_progress_channel_drops_oldest_events():
+    """Test that a full progress channel keeps the most recent events."""
+    async def fill_and_drain():
+        channel = ProgressChannel(asyncio.get_running_loop(), maxsize=3)
+        for event in range(5):
+            channel.put_threadsafe(event)
+        return await channel.get_batch()
+
+    assert asyncio.run(fill_and_drain()) == [2, 3, 4]
+
+
+@pytest.mark.parametrize("use_process_pool", [False, True])
+def test_disconnect_holds_solve_slot_until_solver_stops(use_process_pool):
+    """Test that a client disconnect stops the search before freeing its slot."""
+    rng = np.random.default_rng(0)
+    request = TeamAssignmentRequest(
+        participants=[
+            {"id": i, "group": int(g), "score": int(s)}
+            for i, (g, s) in enumerate(zip(rng.integers(0, 5, 60), rng.integers(0, 40, 60)))
+        ],
+        constraints=[
+            {"attribute": "group", "type": "diversify", "weight": 1},
+            {"attribute": "score", "type": "cluster_numeric", "weight": 1},
+        ],
+        target_team_size=5,
+        max_time=60,
+        use_process_pool=use_process_pool,
+    )
+
+    async def disconnect_after_first_event():
+        stream = main.event_generator(request)
+        await anext(stream)
+        await stream.aclose()
+        # The solve is still running and keeps its slot
+        assert main._inflight_solves == 1
+        started = asyncio.get_running_loop().time()
+        while main._inflight_solves:
+            await asyncio.sleep(0.05)
+        return asyncio.get_running_loop().time() - started
+
+    # The search was stopped rather than running until max_time. The client
+    # context runs the lifespan, which shuts down a started process pool.
+    with TestClient(app):
+        assert asyncio.run(disconnect_after_first_event()) < 10
+    assert main._solve_slots._value == main.MAX_CONCURRENT_SOLVES
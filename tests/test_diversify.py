@@ -1,4 +1,5 @@
 import logging
+import numpy as np
 import pandas as pd
 import sys
 
@@ -51,4 +52,4 @@ def test_diversify():
     # Solution should be found
     assert ta.solution_found, "No solution found"
     # Resulting teams should all be of size 3
-    assert (all(ta.participants["team_num"].value_counts() == 3)), "Wrong team sizes"
+    assert (all(np.bincount(ta.team_assignments) == 3)), "Wrong team sizes"
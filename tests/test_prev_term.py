@@ -1,4 +1,3 @@
-import datetime
 import logging
 import os
 import pandas as pd
@@ -12,6 +11,8 @@ from team_formation.team_assignment import (
     SolutionCallback,
 )
 
+logger = logging.getLogger(__name__)
+
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_ROSTER = os.path.join(TEST_DIR, "data", "roster_prev_term_test.csv")
 
@@ -40,18 +41,16 @@ def roster_model():
     return ta
 
 def team_costs(ta):
-    team_costs = [
-        sum([ta.solver.Value(cost_var) for cost_var
-             in ta.attr_costs
-             if f"_cost_{team_num}_" in cost_var.name])
-        for team_num in range(ta.num_teams)
+    return [
+        sum(ta.solver.Value(cost_var) for cost_var in team_cost_vars)
+        for team_cost_vars in ta.team_costs
     ]
-    return team_costs
 
 def test_prev_term():
     ta = roster_model()
     ta.solve(solution_callback=SolutionCallback(stop_after_seconds=5))
-    print(ta.participants.sort_values("team_num").to_string())
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", ta.participants.sort_values("team_num").to_csv(sep="\t", index=False))
 
 def main():
     test_prev_term()
@@ -1,4 +1,4 @@
-import datetime
+import functools
 import logging
 import os
 import pandas as pd
@@ -12,11 +12,18 @@ from team_formation.team_assignment import (
     SolutionCallback,
 )
 
+logger = logging.getLogger(__name__)
+
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 TEST_ROSTER = os.path.join(TEST_DIR, "data", "test_roster_2.csv")
 
+@functools.lru_cache(maxsize=4)
+def _load_roster(path):
+    return pd.read_csv(path)
+
 def roster_model():
-    partis = pd.read_csv(TEST_ROSTER)
+    # Copy so that solving (which adds team_num) leaves the cached frame intact
+    partis = _load_roster(TEST_ROSTER).copy()
     constraints = pd.DataFrame({
         "attribute": ["work_experience_years"],
         "type": ["cluster_numeric"],
@@ -36,9 +43,19 @@ def test_roster():
     ta.solve(
         solution_callback=SolutionCallback(),
         max_time_in_seconds=20,
+        # More than 16 portfolio workers rarely helps on problems this size
+        num_search_workers=min(16, os.cpu_count() or 8),
     )
-    print(ta.participants.sort_values("team_num").to_string())
-    print([ta.solver.Value(var) for var in ta.attr_costs])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", ta.participants.sort_values("team_num").to_csv(sep="\t", index=False))
+    assert ta.solution_found
+    # Exact per-team spreads; solver cost values are only upper bounds
+    spreads = ta.evaluate_teams()["work_experience_years"]
+    logger.debug("Experience spreads: %s", spreads.tolist())
+    # Teams of consecutive sorted participants already achieve a total
+    # spread of at most the roster's range, so the solver must do as well
+    years = ta.participants["work_experience_years"]
+    assert spreads.sum() <= years.max() - years.min()
 
 def main():
     test_roster()
@@ -1,10 +1,13 @@
+from operator import ge, le
+
+import numpy as np
 import pandas as pd
+import pytest
 
 from team_formation.team_assignment import TeamAssignment
 
-def test_sizel():
-    """The purpose of this test is to make sure that the `less_than_target`
-    argument is respected."""
+@pytest.fixture(scope="module")
+def size_data():
     participants = pd.DataFrame(
         columns=["id", "gender", "job_function", "working_time"],
         data=[[8, "Male", "Manager", ["00-05", "20-24"]],
@@ -22,24 +25,20 @@ def test_sizel():
               ["job_function", "cluster", 1],
               ["working_time", "cluster", 1]]
     )
+    return participants, constraints
 
+@pytest.mark.parametrize("less_than_target,op", [(True, le), (False, ge)])
+def test_sizel(size_data, less_than_target, op):
+    """The purpose of this test is to make sure that the `less_than_target`
+    argument is respected."""
+    participants, constraints = size_data
     ta = TeamAssignment(
-        participants,
-        constraints,
-        target_team_size = 3,
-        less_than_target = True,
-    )
-    ta.solve()
-    # Resulting teams should all be of size 3 or less
-    assert(all(ta.participants["team_num"].value_counts() <= 3))
-
-    ta = TeamAssignment(
-        participants,
+        # solve() adds a team_num column, so keep the shared frame intact
+        participants.copy(),
         constraints,
         target_team_size = 3,
-        less_than_target = False,
+        less_than_target = less_than_target,
     )
     ta.solve()
-    # Resulting teams should all be of size 3 or less
-    assert(all(ta.participants["team_num"].value_counts() >= 3))
-    
+    # Resulting teams should all be of size 3 or less (or 3 or more)
+    assert(all(op(np.bincount(ta.team_assignments), 3)))
@@ -1,12 +1,17 @@
 import logging
+import numpy as np
 import pandas as pd
+import pytest
 import sys
+from ortools.sat.python import cp_model
 
 logging.basicConfig(level=logging.INFO, stream=sys.stdout)
 
-from team_formation.team_assignment import TeamAssignment
+from team_formation.team_assignment import (
+    TeamAssignment, attr_value_matrix, categories_to_bool_vars
+)
 
-def small_model():
+def small_model(**kwargs):
     participants = pd.DataFrame(
         columns=[
             "id",
@@ -39,10 +44,19 @@ def small_model():
         participants,
         constraints,
         target_team_size,
+        **kwargs,
     )
     return ta
     
 
+@pytest.fixture(scope="module")
+def solved_small():
+    """Solved `small_model`, shared by the tests that only read its solution."""
+    ta = small_model()
+    ta.solve()
+    return ta
+
+
 def test_small():
     ta = small_model()
     print(ta.participants)
@@ -57,7 +71,7 @@ def test_small():
     # Solution should be found
     assert(ta.solution_found)
     # Resulting teams should all be of size 3
-    assert(all(ta.participants["team_num"].value_counts() == 3))
+    assert(all(np.bincount(ta.team_assignments) == 3))
     
     print(ta.participants.sort_values("team_num"))
     team_eval = ta.evaluate_teams()
@@ -100,6 +114,127 @@ def micro_model():
     )
     return ta
 
+def test_use_model_from(solved_small):
+    built = solved_small
+    assert(built.solution_found)
+
+    ta = TeamAssignment(
+        built.participants.drop(columns="team_num"),
+        pd.DataFrame(
+            columns=["attribute", "type", "weight"],
+            data=[[name, c["type"], c["weight"]]
+                  for name, c in built.attr_constraints.items()],
+        ),
+        built.target_team_size,
+        build=False,
+    )
+    ta.use_model_from(built)
+    ta.solve()
+
+    # The copied model gives an equally good assignment
+    assert(ta.solution_found)
+    assert(ta.solver.objective_value == built.solver.objective_value)
+    assert(all(np.bincount(ta.team_assignments) == 3))
+
+def test_participant_dicts():
+    built = small_model()
+    participants = built.participants.to_dict(orient="records")
+    constraints = pd.DataFrame(
+        columns=["attribute", "type", "weight"],
+        data=[["gender", "diversify", 1], ["job_function", "cluster", 1]],
+    )
+    ta = TeamAssignment(participants, constraints, 3)
+
+    # Only the constrained attributes become columns
+    assert(list(ta.participants.columns) == ["gender", "job_function"])
+
+    ta.solve()
+    assert(ta.solution_found)
+    assert(len(ta.team_assignments) == len(participants))
+    assert(list(ta.participants["team_num"]) == list(ta.team_assignments))
+
+
+def test_attr_value_matrix():
+    working_time = pd.Series([["00-05", "20-24"], ["20-24"], []], index=[8, 9, 10])
+    val_names = categories_to_bool_vars("working_time", working_time)
+    matrix = attr_value_matrix("working_time", working_time, val_names)
+    assert matrix.tolist() == [[True, True], [False, True], [False, False]]
+
+
+def test_greedy_initial_assignment():
+    ta = small_model()
+    greedy = ta._greedy_initial_assignment()
+    assert np.bincount(greedy).tolist() == ta.team_sizes
+    assert len(ta.model.proto.solution_hint.vars) == ta.num_participants * (ta.num_teams + 1)
+    assert len(small_model(greedy_hint=False).model.proto.solution_hint.vars) == 0
+
+
+def test_hint_assignment(solved_small):
+    previous = solved_small
+    ta = small_model()
+    ta.hint_assignment(previous.team_assignments)
+    hint = ta.model.proto.solution_hint
+    assert len(hint.vars) == ta.num_participants * (ta.num_teams + 1)
+    ta.solve(max_time_in_seconds=10, repair_hint=True)
+    assert ta.solution_found
+    with pytest.raises(ValueError):
+        ta.hint_assignment(previous.team_assignments[:-1])
+
+
+def test_solver_parameters():
+    ta = small_model()
+    ta.solve(
+        max_time_in_seconds=10,
+        num_search_workers=2,
+        linearization_level=2,
+        search_branching=cp_model.PORTFOLIO_SEARCH,
+        cp_model_presolve=False,
+        random_seed=42,
+    )
+    assert ta.solution_found
+    assert ta.solver.parameters.linearization_level == 2
+    assert not ta.solver.parameters.cp_model_presolve
+    assert ta.solver.parameters.random_seed == 42
+
+
+def test_log_callback(capfd):
+    log_lines = []
+    ta = small_model()
+    ta.solve(max_time_in_seconds=10, log_progress=True, log_callback=log_lines.append)
+    assert ta.solution_found
+    assert log_lines
+    assert capfd.readouterr().out == ""
+
+
+def test_debug_names():
+    assert small_model().team_vars[0, 1].name == ""
+    assert small_model(debug_names=True).team_vars[0, 1].name == "parti_0_in_team_1"
+
+
+def test_team_costs():
+    ta = small_model()
+    assert len(ta.team_costs) == ta.num_teams
+    assert sum(len(costs) for costs in ta.team_costs) == len(ta.attr_costs)
+
+    # One tight and one deliberately spread out team
+    ta = TeamAssignment(
+        pd.DataFrame({"years": [0, 1, 2, 10, 50, 90]}),
+        pd.DataFrame(
+            columns=["attribute", "type", "weight"],
+            data=[["years", "cluster_numeric", 1]],
+        ),
+        3,
+    )
+    ta.solve(max_time_in_seconds=10)
+    team_cost_values = [
+        sum(ta.solver.Value(var) for var in costs) for costs in ta.team_costs
+    ]
+    tight_team = ta.team_assignments[0]
+    assert team_cost_values[tight_team] == 2
+    assert team_cost_values[1 - tight_team] == 80
+    assert team_cost_values == ta.evaluate_teams()["years"].tolist()
+
+
 def main():
     test_small()
 
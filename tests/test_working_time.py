@@ -2,7 +2,11 @@ import datetime
 import os
 import pandas as pd
 
-from team_formation.working_time import working_times_hours
+from team_formation.working_time import (
+    working_time_hours,
+    working_times_hour_lists,
+    working_times_hours,
+)
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 WORKING_TIME_CSV = os.path.join(TEST_DIR, "data", "working_time_test.csv")
@@ -15,9 +19,39 @@ def test_working_time():
         "time_zone",
         "working_time",
     )
-    roster["working_hour_list"] = (
-        roster["working_hour_list"].map(lambda hour_str: hour_str.split(";"))
-    )
+    roster["working_hour_list"] = roster["working_hour_list"].str.split(";", regex=False)
     sample_parti = roster.sample().iloc[0]
     print(sample_parti)
     
+
+def test_working_time_hour_lists():
+    roster = pd.DataFrame({
+        "time_zone": ["Asia/Kolkata", "(UTC+05:30) Asia/Kolkata"],
+        "working_time": ["Morning", "Evening"],
+    })
+    hour_lists = working_times_hour_lists(
+        roster, datetime.date(2024, 7, 1), "time_zone", "working_time"
+    )
+    assert hour_lists == [[1, 2, 3, 4, 5], [12, 13, 14, 15, 16]]
+
+
+def test_working_time_hours_offsets():
+    # Half-hour offset (+05:30): 07:00 local is 01:30 UTC
+    assert working_time_hours("Asia/Kolkata", "Morning", datetime.date(2024, 7, 1)) == (
+        1, 2, 3, 4, 5,
+    )
+    # Negative offset with DST: EST (-05:00) in winter, EDT (-04:00) in summer
+    assert working_time_hours("America/New_York", "Morning", datetime.date(2024, 1, 15)) == (
+        12, 13, 14, 15, 16,
+    )
+    assert working_time_hours("America/New_York", "Morning", datetime.date(2024, 7, 1)) == (
+        11, 12, 13, 14, 15,
+    )
+    # DST starts at 02:00 on 2024-03-10, so working hours are already EDT
+    assert working_time_hours("America/New_York", "Morning", datetime.date(2024, 3, 10)) == (
+        11, 12, 13, 14, 15,
+    )
+    # Evening hours wrap past midnight UTC
+    assert working_time_hours("America/New_York", "Evening", datetime.date(2024, 7, 1)) == (
+        22, 23, 0, 1, 2,
+    )